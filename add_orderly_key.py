@@ -2,44 +2,55 @@
 Add Orderly Key for a Privy wallet
 Based on Orderly documentation: https://orderly.network/docs/build-on-omnichain/user-flows/wallet-authentication
 """
-import os
 import sys
 import argparse
 import time
+import orjson
 from dotenv import load_dotenv
-import requests
-from nacl.signing import SigningKey
-from nacl.utils import random
-import base58
-from privy_utils import get_wallet_address, sign_typed_data, PRIVY_API_BASE
-from orderly_constants import ORDERLY_API_URL, CHAIN_ID, BROKER_ID, VERIFYING_CONTRACT
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.serialization import Encoding, PrivateFormat, PublicFormat, NoEncryption
+from orderly_auth import b58encode
+from privy_utils import get_wallet_address, get_orderly_domain, sign_typed_data, PRIVY_API_BASE
+from orderly_constants import ORDERLY_API_URL, CHAIN_ID, BROKER_ID, VERIFYING_CONTRACT, EIP712_DOMAIN_TYPES
 from orderly_db import save_orderly_keys
+from http_client import SESSION
+from orderly_config import get_privy_config
 
 load_dotenv()
 
+# EIP-712 types for adding an Orderly Key
+ADD_ORDERLY_KEY_TYPES = {
+    "EIP712Domain": EIP712_DOMAIN_TYPES,
+    "AddOrderlyKey": [
+        {"name": "brokerId", "type": "string"},
+        {"name": "chainId", "type": "uint256"},
+        {"name": "orderlyKey", "type": "string"},
+        {"name": "scope", "type": "string"},
+        {"name": "timestamp", "type": "uint64"},
+        {"name": "expiration", "type": "uint64"},
+    ],
+}
+
 
 def generate_orderly_key():
     """
     Generate an ed25519 key pair and encode the public key
     
     Returns:
-        Object with orderlyKey (public key) and privateKeyHex (private key in hex format)
+        Object with orderlyKey (public key) and privateKey (raw 32-byte private key)
     """
     # Generate ed25519 key pair
-    private_key = random(32)
-    signing_key = SigningKey(private_key)
-    public_key = signing_key.verify_key.encode()
+    signing_key = Ed25519PrivateKey.generate()
+    private_key = signing_key.private_bytes(Encoding.Raw, PrivateFormat.Raw, NoEncryption())
+    public_key = signing_key.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
     
     # Encode public key using base58
-    encoded_key = base58.b58encode(public_key).decode("utf-8")
+    encoded_key = b58encode(public_key)
     orderly_key = f"ed25519:{encoded_key}"
     
-    # Convert private key to hex format for storage
-    private_key_hex = private_key.hex()
-    
     return {
         "orderlyKey": orderly_key,
-        "privateKeyHex": private_key_hex,
+        "privateKey": private_key,
     }
 
 
@@ -58,10 +69,11 @@ def add_orderly_key(wallet_id: str, chain_id: int = None, broker_id: str = None)
         Result with generated orderlyKey
     """
     # Validate environment variables
-    app_id = os.getenv("PRIVY_APP_ID")
-    app_secret = os.getenv("PRIVY_APP_SECRET")
-    authorization_id = os.getenv("PRIVY_AUTHORIZATION_ID")
-    authorization_secret = os.getenv("PRIVY_AUTHORIZATION_SECRET")
+    config = get_privy_config()
+    app_id = config.app_id
+    app_secret = config.app_secret
+    authorization_id = config.authorization_id
+    authorization_secret = config.authorization_secret
     
     if not app_id or not app_secret:
         raise ValueError(
@@ -103,7 +115,7 @@ def add_orderly_key(wallet_id: str, chain_id: int = None, broker_id: str = None)
         print("\nGenerating ed25519 key pair...")
         key_pair = generate_orderly_key()
         orderly_key = key_pair["orderlyKey"]
-        orderly_private_key_hex = key_pair["privateKeyHex"]
+        orderly_private_key = key_pair["privateKey"]
         
         print(f"   Generated Orderly Key: {orderly_key}")
         
@@ -120,35 +132,12 @@ def add_orderly_key(wallet_id: str, chain_id: int = None, broker_id: str = None)
             "expiration": expiration,
         }
         
-        # Create EIP-712 domain
-        domain = {
-            "name": "Orderly",
-            "version": "1",
-            "chainId": chain_id_hex,
-            "verifyingContract": VERIFYING_CONTRACT,
-        }
-        
-        # Create EIP-712 types
+        # Create EIP-712 typed data from the cached domain and static types
         typed_data = {
-            "domain": domain,
+            "domain": get_orderly_domain(chain_id, VERIFYING_CONTRACT),
             "message": message,
             "primary_type": "AddOrderlyKey",
-            "types": {
-                "EIP712Domain": [
-                    {"name": "name", "type": "string"},
-                    {"name": "version", "type": "string"},
-                    {"name": "chainId", "type": "uint256"},
-                    {"name": "verifyingContract", "type": "address"},
-                ],
-                "AddOrderlyKey": [
-                    {"name": "brokerId", "type": "string"},
-                    {"name": "chainId", "type": "uint256"},
-                    {"name": "orderlyKey", "type": "string"},
-                    {"name": "scope", "type": "string"},
-                    {"name": "timestamp", "type": "uint64"},
-                    {"name": "expiration", "type": "uint64"},
-                ],
-            },
+            "types": ADD_ORDERLY_KEY_TYPES,
         }
         
         print("\nSigning EIP-712 message...")
@@ -160,7 +149,7 @@ def add_orderly_key(wallet_id: str, chain_id: int = None, broker_id: str = None)
         
         # Add Orderly Key
         print("\nAdding Orderly Key to Orderly...")
-        response = requests.post(
+        response = SESSION.post(
             f"{ORDERLY_API_URL}/v1/orderly_key",
             headers={"Content-Type": "application/json"},
             json={
@@ -170,16 +159,17 @@ def add_orderly_key(wallet_id: str, chain_id: int = None, broker_id: str = None)
             }
         )
         
-        data = response.json()
-        
+        # Reject error responses before parsing the body
         if not response.ok:
-            raise Exception(f"Failed to add Orderly Key: {data}")
+            raise Exception(f"Failed to add Orderly Key ({response.status_code}): {response.text}")
+        
+        data = orjson.loads(response.content)
         
         print("\n✅ Orderly Key added successfully!")
         print(f"Response: {data}")
         
         # Save Orderly Key and Private Key to database
-        save_orderly_keys(wallet_id, orderly_key, orderly_private_key_hex)
+        save_orderly_keys(wallet_id, orderly_key, orderly_private_key)
         
         print("\n✅ Saved to database:")
         print(f"   Wallet ID: {wallet_id}")
@@ -190,7 +180,7 @@ def add_orderly_key(wallet_id: str, chain_id: int = None, broker_id: str = None)
             "data": data,
             "userAddress": wallet_address,
             "orderlyKey": orderly_key,
-            "orderlyPrivateKeyHex": orderly_private_key_hex,
+            "orderlyPrivateKeyHex": orderly_private_key.hex(),
         }
     except Exception as error:
         print(f"\n❌ Failed to add Orderly Key: {error}")
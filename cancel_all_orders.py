@@ -2,70 +2,68 @@
 Cancel all outstanding orders for an Orderly account
 Based on Orderly documentation: https://orderly.network/docs/build-on-omnichain/evm-api/restful-api/private/cancel-order
 """
-import os
 import sys
 import argparse
-import time
+import math
+from collections import namedtuple
+from itertools import groupby
+from operator import attrgetter
+from concurrent.futures import ThreadPoolExecutor
+import orjson
 from dotenv import load_dotenv
-from orderly_auth import create_authenticated_request, hex_to_private_key
-import requests
+from orderly_auth import create_authenticated_request
 from urllib.parse import urlencode
-from privy_utils import get_account_id, get_wallet_address
-from orderly_constants import ORDERLY_API_URL, BROKER_ID
-from orderly_db import get_orderly_keys_or_raise
-from get_orders import get_orders
+from orderly_constants import (
+    ORDERLY_API_URL,
+    ORDER_RATE_LIMIT_PER_SECOND,
+    MAX_CONCURRENT_ORDER_REQUESTS,
+)
+from orderly_client import OrderlyAccount, get_orderly_account, orderly_get
+from cancel_order import send_cancel_order
+from http_client import RateLimiter, SESSION
 
 load_dotenv()
 
+# Order statuses that can still be cancelled
+CANCELLABLE_STATUSES = frozenset(("NEW", "PARTIAL_FILLED"))
 
-def cancel_order(wallet_id: str, order_id: int, symbol: str) -> dict:
-    """Cancel a single order on Orderly Network"""
-    app_id = os.getenv("PRIVY_APP_ID")
-    app_secret = os.getenv("PRIVY_APP_SECRET")
-    
-    # Get Orderly keys from database
-    orderly_key, orderly_private_key_hex = get_orderly_keys_or_raise(wallet_id)
-    orderly_private_key = hex_to_private_key(orderly_private_key_hex)
-    
-    wallet_address = get_wallet_address(wallet_id, app_id, app_secret)
-    account_id = get_account_id(wallet_address, BROKER_ID)
-    
-    # Build query parameters
-    query_params = urlencode({
-        "order_id": str(order_id),
-        "symbol": symbol
-    })
-    path = f"/v1/order?{query_params}"
+# Fields of an order that are needed for listing and cancelling it
+Order = namedtuple("Order", "order_id symbol side type quantity price status")
+
+
+def cancel_orders_by_symbol(account: OrderlyAccount, symbol: str) -> dict:
+    """Cancel every open order for a symbol with a single bulk cancel request"""
+    query_params = urlencode({"symbol": symbol})
+    path = f"/v1/orders?{query_params}"
     
     # Create authenticated request
     request_config = create_authenticated_request(
         "DELETE",
         path,
         None,
-        account_id,
-        orderly_key,
-        orderly_private_key
+        account.account_id,
+        account.orderly_key,
+        account.signing_key
     )
     
     # Make the request
-    response = requests.delete(
+    response = SESSION.delete(
         f"{ORDERLY_API_URL}{path}",
         headers=request_config["headers"]
     )
     
-    data = response.json()
-    
+    # Reject error responses before parsing the body
     if not response.ok:
-        raise Exception(f"Failed to cancel order: {data}")
+        raise Exception(f"Failed to cancel orders for {symbol} ({response.status_code}): {response.text}")
+    
+    data = orjson.loads(response.content)
     
     if not data.get("success"):
-        raise Exception(f"Cancel order failed: {data}")
+        raise Exception(f"Cancel orders for {symbol} failed: {data}")
     
     return {
         "success": True,
         "data": data.get("data"),
-        "status": data.get("data", {}).get("status"),
-        "orderId": order_id,
         "symbol": symbol,
     }
 
@@ -80,20 +78,9 @@ def cancel_all_orders(wallet_id: str) -> dict:
     Returns:
         Summary of cancelled orders
     """
-    app_id = os.getenv("PRIVY_APP_ID")
-    app_secret = os.getenv("PRIVY_APP_SECRET")
-    
-    if not app_id or not app_secret:
-        raise ValueError("Missing PRIVY_APP_ID or PRIVY_APP_SECRET")
-    if not wallet_id:
-        raise ValueError("Wallet ID is required")
-    
-    # Get wallet address
-    print("Fetching wallet details...")
-    wallet_address = get_wallet_address(wallet_id, app_id, app_secret)
-    print(f"   Wallet Address: {wallet_address}")
-    
-    account_id = get_account_id(wallet_address, BROKER_ID)
+    account = get_orderly_account(wallet_id)
+    wallet_address = account.wallet_address
+    account_id = account.account_id
     
     print("\n📋 Fetching all orders...")
     print(f"   Wallet ID: {wallet_id}")
@@ -101,47 +88,52 @@ def cancel_all_orders(wallet_id: str) -> dict:
     print(f"   Account ID: {account_id}")
     
     # Fetch all orders (handle pagination)
-    all_orders = []
-    page = 1
     page_size = 500  # Maximum page size
+    page_rate_limiter = RateLimiter(ORDER_RATE_LIMIT_PER_SECOND)
     
-    while True:
+    def fetch_page(page):
+        page_rate_limiter.wait()
         print(f"   Fetching page {page}...")
-        result = get_orders(
-            wallet_id=wallet_id,
-            page=page,
-            size=page_size
+        # INCOMPLETE limits results to open (NEW and PARTIAL_FILLED) orders
+        query_params = urlencode({"status": "INCOMPLETE", "page": page, "size": page_size})
+        return orderly_get(f"/v1/orders?{query_params}", account, "get orders").get("data", {})
+    
+    # Only keep cancellable orders (NEW and PARTIAL_FILLED) as each page arrives,
+    # reading the fields we need from each order dict once
+    cancellable_orders = []
+    
+    def collect_cancellable(result):
+        cancellable_orders.extend(
+            Order(
+                order.get("order_id"),
+                order.get("symbol", "N/A"),
+                order.get("side", "N/A"),
+                order.get("type", "N/A"),
+                order.get("quantity", 0),
+                order.get("price", 0),
+                order.get("status", "N/A"),
+            )
+            for order in result.get("rows", [])
+            if order.get("status", "").upper() in CANCELLABLE_STATUSES
         )
-        
-        orders = result.get("orders", [])
-        if not orders:
-            break
-        
-        all_orders.extend(orders)
-        
-        # Check if there are more pages
-        meta = result.get("meta", {})
-        total = meta.get("total", len(orders))
-        current_page = meta.get("current_page", page)
-        records_per_page = meta.get("records_per_page", page_size)
-        
-        if len(all_orders) >= total:
-            break
-        
-        page += 1
     
-    print(f"\n✅ Found {len(all_orders)} total order(s)")
+    # The first page tells us how many pages there are in total
+    result = fetch_page(1)
+    page_orders = result.get("rows", [])
+    collect_cancellable(result)
     
-    # Filter cancellable orders (NEW and PARTIAL_FILLED)
-    cancellable_statuses = ["NEW", "PARTIAL_FILLED"]
+    records_per_page = result.get("meta", {}).get("records_per_page") or page_size
+    total = result.get("meta", {}).get("total", len(page_orders))
+    total_pages = math.ceil(total / records_per_page) if page_orders else 1
     
-    cancellable_orders = [
-        order for order in all_orders
-        if order.get("status", "").upper() in cancellable_statuses
-    ]
+    # Fetch the remaining pages concurrently, keeping results in page order
+    if total_pages > 1:
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_ORDER_REQUESTS) as executor:
+            for result in executor.map(fetch_page, range(2, total_pages + 1)):
+                collect_cancellable(result)
     
     if not cancellable_orders:
-        print(f"\n✅ No cancellable orders found (status: {', '.join(cancellable_statuses)}).")
+        print(f"\n✅ No cancellable orders found (status: {', '.join(sorted(CANCELLABLE_STATUSES))}).")
         return {
             "success": True,
             "cancelled_count": 0,
@@ -150,85 +142,110 @@ def cancel_all_orders(wallet_id: str) -> dict:
             "accountId": account_id,
         }
     
-    print(f"\n📈 Found {len(cancellable_orders)} cancellable order(s) to cancel:")
-    print("-" * 100)
-    
-    for idx, order in enumerate(cancellable_orders, 1):
-        order_id = order.get("order_id")
-        symbol = order.get("symbol", "N/A")
-        side = order.get("side", "N/A")
-        order_type = order.get("type", "N/A")
-        status = order.get("status", "N/A")
-        quantity = order.get("quantity", 0)
-        price = order.get("price", 0)
-        
-        print(f"{idx}. Order #{order_id}: {symbol} {side} {order_type} - Qty: {quantity} @ ${price} (Status: {status})")
+    # Build the order listing and print it in one write
+    lines = [f"\n📈 Found {len(cancellable_orders)} cancellable order(s) to cancel:", "-" * 100]
+    
+    for idx, (order_id, symbol, side, order_type, quantity, price, status) in enumerate(cancellable_orders, 1):
+        lines.append(f"{idx}. Order #{order_id}: {symbol} {side} {order_type} - Qty: {quantity} @ ${price} (Status: {status})")
     
-    print("\n🔄 Cancelling all orders...")
-    print("-" * 100)
+    lines.extend(["\n🔄 Cancelling all orders...", "-" * 100])
+    print("\n".join(lines))
     
     cancelled_orders = []
     failed_orders = []
     
-    for idx, order in enumerate(cancellable_orders, 1):
-        order_id = order.get("order_id")
-        symbol = order.get("symbol", "N/A")
-        side = order.get("side", "N/A")
-        order_type = order.get("type", "N/A")
-        quantity = order.get("quantity", 0)
-        price = order.get("price", 0)
+    def order_summary(order):
+        return {
+            "orderId": order.order_id,
+            "symbol": order.symbol,
+            "side": order.side,
+            "type": order.type,
+            "quantity": order.quantity,
+            "price": order.price,
+        }
+    
+    # Group orders by symbol so each symbol needs only one bulk cancel request
+    order_symbol = attrgetter("symbol")
+    
+    orders_by_symbol = {
+        symbol: list(orders)
+        for symbol, orders in groupby(sorted(cancellable_orders, key=order_symbol), key=order_symbol)
+    }
+    
+    # Cancel concurrently, paced to stay within Orderly's rate limit
+    rate_limiter = RateLimiter(ORDER_RATE_LIMIT_PER_SECOND)
+    
+    def cancel_symbol_with_rate_limit(symbol):
+        rate_limiter.wait()
+        return cancel_orders_by_symbol(account, symbol)
+    
+    def cancel_with_rate_limit(order_id, symbol):
+        rate_limiter.wait()
+        return send_cancel_order(account, order_id, symbol)
+    
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_ORDER_REQUESTS) as executor:
+        symbol_futures = {
+            symbol: executor.submit(cancel_symbol_with_rate_limit, symbol)
+            for symbol in orders_by_symbol
+        }
         
-        print(f"\n[{idx}/{len(cancellable_orders)}] Cancelling Order #{order_id} ({symbol})...")
+        # Orders whose bulk cancel failed are retried one by one
+        fallback_orders = []
         
-        try:
-            cancel_result = cancel_order(wallet_id, order_id, symbol)
+        for symbol, future in symbol_futures.items():
+            orders = orders_by_symbol[symbol]
+            print(f"\nCancelling {len(orders)} order(s) for {symbol}...")
             
-            print(f"   ✅ Order cancelled successfully: Status {cancel_result.get('status', 'N/A')}")
+            try:
+                future.result()
+                print(f"   ✅ All {symbol} orders cancelled successfully")
+                cancelled_orders.extend({**order_summary(order), "status": "success"} for order in orders)
+            except Exception as error:
+                print(f"   ⚠️  Bulk cancel failed, falling back to per-order cancellation: {error}")
+                fallback_orders.extend(orders)
+        
+        futures = [
+            executor.submit(cancel_with_rate_limit, order.order_id, order.symbol)
+            for order in fallback_orders
+        ]
+        
+        for idx, (order, future) in enumerate(zip(fallback_orders, futures), 1):
+            summary = order_summary(order)
             
-            cancelled_orders.append({
-                "orderId": order_id,
-                "symbol": symbol,
-                "side": side,
-                "type": order_type,
-                "quantity": quantity,
-                "price": price,
-                "status": "success"
-            })
+            print(f"\n[{idx}/{len(fallback_orders)}] Cancelling Order #{summary['orderId']} ({summary['symbol']})...")
             
-            # Small delay between cancellations to avoid rate limiting
-            if idx < len(cancellable_orders):
-                time.sleep(0.3)
+            try:
+                cancel_result = future.result()
                 
-        except Exception as error:
-            print(f"   ❌ Failed to cancel order: {error}")
-            failed_orders.append({
-                "orderId": order_id,
-                "symbol": symbol,
-                "side": side,
-                "type": order_type,
-                "quantity": quantity,
-                "price": price,
-                "error": str(error),
-                "status": "failed"
-            })
-    
-    print("\n" + "=" * 100)
-    print("\n📝 Cancellation Summary:")
-    print(f"   Total Cancellable Orders: {len(cancellable_orders)}")
-    print(f"   Successfully Cancelled: {len(cancelled_orders)}")
-    print(f"   Failed: {len(failed_orders)}")
+                print(f"   ✅ Order cancelled successfully: Status {cancel_result.get('data', {}).get('status', 'N/A')}")
+                
+                cancelled_orders.append({**summary, "status": "success"})
+            except Exception as error:
+                print(f"   ❌ Failed to cancel order: {error}")
+                failed_orders.append({**summary, "error": str(error), "status": "failed"})
+    
+    # Build the summary and print it in one write
+    lines = [
+        "\n" + "=" * 100,
+        "\n📝 Cancellation Summary:",
+        f"   Total Cancellable Orders: {len(cancellable_orders)}",
+        f"   Successfully Cancelled: {len(cancelled_orders)}",
+        f"   Failed: {len(failed_orders)}",
+    ]
     
     if cancelled_orders:
-        print("\n✅ Successfully Cancelled Orders:")
+        lines.append("\n✅ Successfully Cancelled Orders:")
         for order in cancelled_orders:
-            print(f"   - Order #{order['orderId']}: {order['symbol']} {order['side']} {order['type']} "
-                  f"(Qty: {order['quantity']} @ ${order['price']})")
+            lines.append(f"   - Order #{order['orderId']}: {order['symbol']} {order['side']} {order['type']} "
+                         f"(Qty: {order['quantity']} @ ${order['price']})")
     
     if failed_orders:
-        print("\n❌ Failed to Cancel Orders:")
+        lines.append("\n❌ Failed to Cancel Orders:")
         for order in failed_orders:
-            print(f"   - Order #{order['orderId']}: {order['symbol']} {order['side']} {order['type']} "
-                  f"- Error: {order['error']}")
+            lines.append(f"   - Order #{order['orderId']}: {order['symbol']} {order['side']} {order['type']} "
+                         f"- Error: {order['error']}")
+    
+    print("\n".join(lines))
     
     return {
         "success": len(failed_orders) == 0,
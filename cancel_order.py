@@ -2,85 +2,174 @@
 Cancel an order on Orderly Network using Privy agentic wallet
 Based on Orderly documentation: https://orderly.network/docs/build-on-omnichain/evm-api/restful-api/private/cancel-order
 """
-import os
 import sys
 import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+import orjson
 from dotenv import load_dotenv
-from web3 import Web3
-from orderly_auth import create_authenticated_request, hex_to_private_key
-import requests
-from urllib.parse import urlencode
-from privy_utils import get_account_id, get_wallet_address
-from orderly_constants import ORDERLY_API_URL, BROKER_ID
-from orderly_db import get_orderly_keys_or_raise
+from orderly_auth import create_authenticated_request
+from urllib.parse import quote_plus, urlencode
+from orderly_constants import (
+    ORDERLY_API_URL,
+    ORDER_RATE_LIMIT_PER_SECOND,
+    MAX_CONCURRENT_ORDER_REQUESTS,
+    MAX_BATCH_ORDER_SIZE,
+)
+from orderly_client import OrderlyAccount, get_orderly_account
+from http_client import RateLimiter, SESSION
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
 
-def cancel_order(wallet_id: str, order_id: int = None, symbol: str = None) -> dict:
-    """Cancel an order on Orderly Network"""
-    app_id = os.getenv("PRIVY_APP_ID")
-    app_secret = os.getenv("PRIVY_APP_SECRET")
+
+def _build_cancel_path(order_id: int, symbol: str) -> str:
+    """Build the single-order cancel path; the same string is signed and requested"""
+    return f"/v1/order?order_id={int(order_id)}&symbol={quote_plus(symbol)}"
+
+
+def send_cancel_order(account: OrderlyAccount, order_id: int, symbol: str) -> dict:
+    """
+    Send a single cancel order request using already-resolved account credentials
     
-    if not app_id or not app_secret:
-        raise ValueError("Missing PRIVY_APP_ID or PRIVY_APP_SECRET")
-    if not wallet_id:
-        raise ValueError("Wallet ID is required")
-    if not order_id:
-        raise ValueError("Order ID is required")
-    if not symbol:
-        raise ValueError("Symbol is required")
+    Args:
+        account: Credentials from get_orderly_account
+        order_id: Order ID to cancel
+        symbol: Trading symbol of the order
+        
+    Returns:
+        Parsed JSON response
+    """
+    path = _build_cancel_path(order_id, symbol)
+    
+    # Create authenticated request
+    request_config = create_authenticated_request(
+        "DELETE",
+        path,
+        None,
+        account.account_id,
+        account.orderly_key,
+        account.signing_key
+    )
+    
+    # Make the request
+    response = SESSION.delete(
+        f"{ORDERLY_API_URL}{path}",
+        headers=request_config["headers"]
+    )
     
-    # Get Orderly keys from database
-    orderly_key, orderly_private_key_hex = get_orderly_keys_or_raise(wallet_id)
-    orderly_private_key = hex_to_private_key(orderly_private_key_hex)
+    # Reject error responses before parsing the body
+    if not response.ok:
+        raise Exception(f"Failed to cancel order ({response.status_code}): {response.text}")
     
-    print("Fetching wallet details...")
-    wallet_address = get_wallet_address(wallet_id, app_id, app_secret)
-    print(f"   Wallet Address: {wallet_address}")
+    data = orjson.loads(response.content)
     
-    account_id = get_account_id(wallet_address, BROKER_ID)
+    if not data.get("success"):
+        raise Exception(f"Cancel order failed: {data}")
     
-    print("\nPreparing order cancellation...")
-    print(f"   Wallet ID: {wallet_id}")
-    print(f"   Wallet Address: {wallet_address}")
-    print(f"   Account ID: {account_id}")
-    print(f"   Order ID: {order_id}")
-    print(f"   Symbol: {symbol}")
+    return data
+
+
+def send_batch_cancel_orders(account: OrderlyAccount, order_ids: List[int]) -> dict:
+    """
+    Cancel up to MAX_BATCH_ORDER_SIZE orders with a single batch cancel request
     
-    # Build query parameters
-    query_params = urlencode({
-        "order_id": str(order_id),
-        "symbol": symbol
-    })
-    path = f"/v1/order?{query_params}"
+    Args:
+        account: Credentials from get_orderly_account
+        order_ids: Order IDs to cancel
+        
+    Returns:
+        Parsed JSON response
+    """
+    query_params = urlencode({"order_ids": ",".join(str(order_id) for order_id in order_ids)})
+    path = f"/v1/batch-order?{query_params}"
     
     # Create authenticated request
     request_config = create_authenticated_request(
         "DELETE",
         path,
         None,
-        account_id,
-        orderly_key,
-        orderly_private_key
+        account.account_id,
+        account.orderly_key,
+        account.signing_key
     )
     
     # Make the request
-    response = requests.delete(
+    response = SESSION.delete(
         f"{ORDERLY_API_URL}{path}",
         headers=request_config["headers"]
     )
     
-    data = response.json()
-    
+    # Reject error responses before parsing the body
     if not response.ok:
-        raise Exception(f"Failed to cancel order: {data}")
+        raise Exception(f"Failed to batch cancel orders ({response.status_code}): {response.text}")
+    
+    data = orjson.loads(response.content)
     
     if not data.get("success"):
-        raise Exception(f"Cancel order failed: {data}")
+        raise Exception(f"Batch cancel orders failed: {data}")
+    
+    return data
+
+
+def _split_batch_cancel_results(batch: List[Tuple[int, str]], data: dict) -> Tuple[List[dict], List[Tuple[int, str]]]:
+    """
+    Split a batch cancel response into cancelled orders and orders that were not cancelled
+    
+    Orderly reports one row per order ID; a row with an error code (order already
+    filled, unknown ID, ...) or an order missing from the rows counts as not
+    cancelled. A response without rows applies its overall status to every order.
+    
+    Args:
+        batch: (order_id, symbol) pairs sent in the batch
+        data: Parsed batch cancel response
+        
+    Returns:
+        Tuple of (cancelled order summaries, (order_id, symbol) pairs to retry)
+    """
+    result = data.get("data") or {}
+    rows = result.get("rows")
+    
+    if rows is None:
+        status = result.get("status")
+        return [{"orderId": order_id, "symbol": symbol, "status": status} for order_id, symbol in batch], []
     
-    print("\n✅ Order cancelled successfully!")
-    print(f"Response: {data}")
+    rows_by_id = {str(row.get("order_id")): row for row in rows}
+    cancelled = []
+    failed = []
+    
+    for order_id, symbol in batch:
+        row = rows_by_id.get(str(order_id))
+        if row is None or row.get("success") is False or row.get("error_code"):
+            failed.append((order_id, symbol))
+        else:
+            cancelled.append({"orderId": order_id, "symbol": symbol, "status": row.get("status") or result.get("status")})
+    
+    return cancelled, failed
+
+
+def cancel_order(wallet_id: str, order_id: int = None, symbol: str = None) -> dict:
+    """Cancel an order on Orderly Network"""
+    if not order_id:
+        raise ValueError("Order ID is required")
+    if not symbol:
+        raise ValueError("Symbol is required")
+    
+    account = get_orderly_account(wallet_id)
+    
+    logger.info("Preparing order cancellation...")
+    logger.info("   Wallet ID: %s", wallet_id)
+    logger.info("   Wallet Address: %s", account.wallet_address)
+    logger.info("   Account ID: %s", account.account_id)
+    logger.info("   Order ID: %s", order_id)
+    logger.info("   Symbol: %s", symbol)
+    
+    data = send_cancel_order(account, order_id, symbol)
+    
+    logger.info("✅ Order cancelled successfully!")
+    logger.info("Response: %s", data)
     
     return {
         "success": True,
@@ -88,32 +177,148 @@ def cancel_order(wallet_id: str, order_id: int = None, symbol: str = None) -> di
         "status": data.get("data", {}).get("status"),
         "orderId": order_id,
         "symbol": symbol,
-        "walletAddress": wallet_address,
-        "accountId": account_id,
+        "walletAddress": account.wallet_address,
+        "accountId": account.account_id,
+    }
+
+
+def cancel_orders(wallet_id: str, orders: List[Tuple[int, str]]) -> dict:
+    """
+    Cancel several orders with batch cancel requests
+    
+    Orders are cancelled MAX_BATCH_ORDER_SIZE at a time with one signed request per
+    batch. Batches run concurrently, paced to stay within Orderly's rate limit. Each
+    order's own result is read from the batch response, and orders that the batch
+    did not cancel (or whose whole batch failed) are retried one by one.
+    
+    Args:
+        wallet_id: The Privy wallet ID (required)
+        orders: List of (order_id, symbol) pairs to cancel
+        
+    Returns:
+        Summary with cancelled and failed orders
+    """
+    if not orders:
+        raise ValueError("At least one order is required")
+    for order_id, symbol in orders:
+        if not order_id or not symbol:
+            raise ValueError("Each order needs an order ID and a symbol")
+    
+    account = get_orderly_account(wallet_id)
+    
+    batches = [orders[i:i + MAX_BATCH_ORDER_SIZE] for i in range(0, len(orders), MAX_BATCH_ORDER_SIZE)]
+    
+    logger.info("Cancelling %d order(s) in %d batch request(s)...", len(orders), len(batches))
+    logger.info("   Wallet ID: %s", wallet_id)
+    logger.info("   Account ID: %s", account.account_id)
+    
+    rate_limiter = RateLimiter(ORDER_RATE_LIMIT_PER_SECOND)
+    
+    def cancel_batch_with_rate_limit(batch):
+        rate_limiter.wait()
+        return send_batch_cancel_orders(account, [order_id for order_id, _ in batch])
+    
+    def cancel_with_rate_limit(order):
+        rate_limiter.wait()
+        return send_cancel_order(account, *order)
+    
+    cancelled_orders = []
+    failed_orders = []
+    
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_ORDER_REQUESTS) as executor:
+        batch_futures = [executor.submit(cancel_batch_with_rate_limit, batch) for batch in batches]
+        
+        # Orders the batch cancel did not cancel are retried one by one
+        fallback_orders = []
+        
+        for batch, future in zip(batches, batch_futures):
+            try:
+                cancelled, failed = _split_batch_cancel_results(batch, future.result())
+                cancelled_orders.extend(cancelled)
+                if failed:
+                    logger.warning("   ⚠️  %d order(s) not cancelled by batch, falling back to per-order cancellation", len(failed))
+                fallback_orders.extend(failed)
+            except Exception as error:
+                logger.warning("   ⚠️  Batch cancel failed, falling back to per-order cancellation: %s", error)
+                fallback_orders.extend(batch)
+        
+        futures = [executor.submit(cancel_with_rate_limit, order) for order in fallback_orders]
+        
+        for (order_id, symbol), future in zip(fallback_orders, futures):
+            try:
+                data = future.result()
+                cancelled_orders.append({
+                    "orderId": order_id,
+                    "symbol": symbol,
+                    "status": data.get("data", {}).get("status"),
+                })
+            except Exception as error:
+                failed_orders.append({"orderId": order_id, "symbol": symbol, "error": str(error)})
+    
+    return {
+        "success": len(failed_orders) == 0,
+        "cancelled_orders": cancelled_orders,
+        "failed_orders": failed_orders,
+        "walletAddress": account.wallet_address,
+        "accountId": account.account_id,
     }
 
 
 def main():
     parser = argparse.ArgumentParser(description="Cancel an order on Orderly Network")
     parser.add_argument("--wallet-id", required=True, help="Privy wallet ID to use (required)")
-    parser.add_argument("--order-id", type=int, required=True, help="Order ID to cancel (required)")
-    parser.add_argument("--symbol", required=True, help="Trading symbol (e.g., 'PERP_ETH_USDC') (required)")
+    parser.add_argument("--order-id", required=True, help="Order ID to cancel, or comma-separated order IDs (required)")
+    parser.add_argument("--symbol", required=True,
+                        help="Trading symbol (e.g., 'PERP_ETH_USDC'), or one comma-separated symbol per order ID (required)")
     
     args = parser.parse_args()
     
+    # Progress details are logged; show them on the terminal when run as a script
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     try:
-        result = cancel_order(
-            wallet_id=args.wallet_id,
-            order_id=args.order_id,
-            symbol=args.symbol
-        )
+        order_ids = [int(order_id) for order_id in args.order_id.split(",")]
+        symbols = args.symbol.split(",")
         
-        print("\n📝 Cancellation Summary:")
-        print(f"   Wallet Address: {result['walletAddress']}")
-        print(f"   Account ID: {result['accountId']}")
-        print(f"   Order ID: {result['orderId']}")
-        print(f"   Symbol: {result['symbol']}")
-        print(f"   Status: {result.get('status', 'N/A')}")
+        if len(symbols) == 1:
+            symbols = symbols * len(order_ids)
+        elif len(symbols) != len(order_ids):
+            raise ValueError("Pass one symbol for all orders or one symbol per order ID")
+        
+        if len(order_ids) == 1:
+            result = cancel_order(
+                wallet_id=args.wallet_id,
+                order_id=order_ids[0],
+                symbol=symbols[0]
+            )
+            
+            print("\n📝 Cancellation Summary:")
+            print(f"   Wallet Address: {result['walletAddress']}")
+            print(f"   Account ID: {result['accountId']}")
+            print(f"   Order ID: {result['orderId']}")
+            print(f"   Symbol: {result['symbol']}")
+            print(f"   Status: {result.get('status', 'N/A')}")
+        else:
+            result = cancel_orders(
+                wallet_id=args.wallet_id,
+                orders=list(zip(order_ids, symbols))
+            )
+            
+            lines = [
+                "\n📝 Cancellation Summary:",
+                f"   Wallet Address: {result['walletAddress']}",
+                f"   Account ID: {result['accountId']}",
+                f"   Successfully Cancelled: {len(result['cancelled_orders'])}",
+                f"   Failed: {len(result['failed_orders'])}",
+            ]
+            for order in result["cancelled_orders"]:
+                lines.append(f"   ✅ Order #{order['orderId']} ({order['symbol']}): {order.get('status') or 'N/A'}")
+            for order in result["failed_orders"]:
+                lines.append(f"   ❌ Order #{order['orderId']} ({order['symbol']}): {order['error']}")
+            print("\n".join(lines))
+            
+            if not result["success"]:
+                sys.exit(1)
         
         sys.exit(0)
     except Exception as error:
@@ -123,4 +328,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
@@ -2,15 +2,18 @@
 Close all open positions for an Orderly account using MARKET orders
 Based on Orderly documentation: https://orderly.network/docs/build-on-omnichain/evm-api/restful-api/private/create-order
 """
-import os
 import sys
 import argparse
-import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from privy_utils import get_account_id, get_wallet_address
-from orderly_constants import BROKER_ID
-from get_positions import get_positions
-from create_order import create_order
+from orderly_constants import (
+    ORDER_RATE_LIMIT_PER_SECOND,
+    MAX_CONCURRENT_ORDER_REQUESTS,
+    MAX_BATCH_ORDER_SIZE,
+)
+from orderly_client import get_orderly_account, orderly_get
+from create_order import create_orders_batch, send_order
+from http_client import RateLimiter
 
 load_dotenv()
 
@@ -25,29 +28,18 @@ def close_all_positions(wallet_id: str) -> dict:
     Returns:
         Summary of closed positions
     """
-    app_id = os.getenv("PRIVY_APP_ID")
-    app_secret = os.getenv("PRIVY_APP_SECRET")
-    
-    if not app_id or not app_secret:
-        raise ValueError("Missing PRIVY_APP_ID or PRIVY_APP_SECRET")
-    if not wallet_id:
-        raise ValueError("Wallet ID is required")
-    
-    # Get wallet address
-    print("Fetching wallet details...")
-    wallet_address = get_wallet_address(wallet_id, app_id, app_secret)
-    print(f"   Wallet Address: {wallet_address}")
-    
-    account_id = get_account_id(wallet_address, BROKER_ID)
+    # Resolve the account once; it is used for the positions read and every close order
+    account = get_orderly_account(wallet_id)
+    wallet_address = account.wallet_address
+    account_id = account.account_id
     
     print("\n📊 Fetching current positions...")
     print(f"   Wallet ID: {wallet_id}")
     print(f"   Wallet Address: {wallet_address}")
     print(f"   Account ID: {account_id}")
     
-    # Get all positions
-    positions_result = get_positions(wallet_id)
-    positions = positions_result.get("positions", [])
+    # Get all positions with the already resolved account
+    positions = orderly_get("/v1/positions", account, "get positions").get("data", {}).get("rows", [])
     
     if not positions:
         print("\n✅ No open positions found. Nothing to close.")
@@ -75,86 +67,129 @@ def close_all_positions(wallet_id: str) -> dict:
             "accountId": account_id,
         }
     
-    print(f"\n📈 Found {len(open_positions)} open position(s) to close:")
-    print("-" * 100)
+    # Build the position listing and print it in one write
+    lines = [f"\n📈 Found {len(open_positions)} open position(s) to close:", "-" * 100]
     
     for idx, pos in enumerate(open_positions, 1):
         symbol = pos.get("symbol", "N/A")
         position_qty = pos.get("position_qty", 0)
         side = "LONG" if position_qty > 0 else "SHORT"
-        print(f"{idx}. {symbol} ({side}) - Quantity: {position_qty}")
+        lines.append(f"{idx}. {symbol} ({side}) - Quantity: {position_qty}")
     
-    print("\n🔄 Closing all positions...")
-    print("-" * 100)
+    lines.extend(["\n🔄 Closing all positions...", "-" * 100])
+    print("\n".join(lines))
     
     closed_positions = []
     failed_positions = []
     
-    for idx, pos in enumerate(open_positions, 1):
-        symbol = pos.get("symbol", "N/A")
+    # For MARKET orders on futures/perpetual contracts:
+    # Both BUY and SELL orders use order_quantity (base currency)
+    # Determine side: SELL to close LONG, BUY to close SHORT
+    def close_order_params(pos):
         position_qty = pos.get("position_qty", 0)
-        abs_qty = abs(position_qty)
-        
-        # Determine side: SELL to close LONG, BUY to close SHORT
-        side = "SELL" if position_qty > 0 else "BUY"
+        return {
+            "symbol": pos.get("symbol", "N/A"),
+            "order_type": "MARKET",
+            "side": "SELL" if position_qty > 0 else "BUY",
+            "reduce_only": True,
+            "order_quantity": abs(position_qty),
+        }
+    
+    def record_closed(params, order_id):
+        print(f"   ✅ {params['symbol']} closed: Order ID {order_id}")
+        closed_positions.append({
+            "symbol": params["symbol"],
+            "side": params["side"],
+            "quantity": params["order_quantity"],
+            "orderId": order_id,
+            "status": "success"
+        })
+    
+    # Submit close orders concurrently, paced to stay within Orderly's rate limit
+    rate_limiter = RateLimiter(ORDER_RATE_LIMIT_PER_SECOND)
+    
+    def create_batch_with_rate_limit(orders):
+        rate_limiter.wait()
+        return create_orders_batch(account_id, account.orderly_key, account.signing_key, orders)
+    
+    def create_order_with_rate_limit(params):
+        rate_limiter.wait()
+        return send_order(account, params)
+    
+    batches = [
+        open_positions[i:i + MAX_BATCH_ORDER_SIZE]
+        for i in range(0, len(open_positions), MAX_BATCH_ORDER_SIZE)
+    ]
+    
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_ORDER_REQUESTS) as executor:
+        batch_futures = [
+            executor.submit(create_batch_with_rate_limit, [close_order_params(pos) for pos in batch])
+            for batch in batches
+        ]
         
-        print(f"\n[{idx}/{len(open_positions)}] Closing {symbol} ({side} {abs_qty})...")
+        # Positions not closed by a batch request are retried one by one
+        fallback_positions = []
         
-        try:
-            # For MARKET orders on futures/perpetual contracts:
-            # Both BUY and SELL orders use order_quantity (base currency)
-            order_kwargs = {
-                "wallet_id": wallet_id,
-                "symbol": symbol,
-                "order_type": "MARKET",
-                "side": side,
-                "reduce_only": True,
-                "order_quantity": abs_qty
-            }
+        for batch, future in zip(batches, batch_futures):
+            print(f"\nClosing {len(batch)} position(s) with a batch order...")
             
-            # Create order to close position
-            order_result = create_order(**order_kwargs)
+            try:
+                rows = future.result()
+            except Exception as error:
+                print(f"   ⚠️  Batch order failed, falling back to per-order closes: {error}")
+                fallback_positions.extend(batch)
+                continue
             
-            order_id = order_result.get("orderId")
-            print(f"   ✅ Order created successfully: Order ID {order_id}")
+            for idx, pos in enumerate(batch):
+                row = rows[idx] if idx < len(rows) else {}
+                if row.get("order_id") is not None:
+                    record_closed(close_order_params(pos), row["order_id"])
+                else:
+                    fallback_positions.append(pos)
+        
+        futures = [
+            executor.submit(create_order_with_rate_limit, close_order_params(pos))
+            for pos in fallback_positions
+        ]
+        
+        for idx, (pos, future) in enumerate(zip(fallback_positions, futures), 1):
+            params = close_order_params(pos)
             
-            closed_positions.append({
-                "symbol": symbol,
-                "side": side,
-                "quantity": abs_qty,
-                "orderId": order_id,
-                "status": "success"
-            })
+            print(f"\n[{idx}/{len(fallback_positions)}] Closing {params['symbol']} ({params['side']} {params['order_quantity']})...")
             
-            # Small delay between orders to avoid rate limiting
-            if idx < len(open_positions):
-                time.sleep(0.5)
-                
-        except Exception as error:
-            print(f"   ❌ Failed to close position: {error}")
-            failed_positions.append({
-                "symbol": symbol,
-                "side": side,
-                "quantity": abs_qty,
-                "error": str(error),
-                "status": "failed"
-            })
-    
-    print("\n" + "=" * 100)
-    print("\n📝 Closing Summary:")
-    print(f"   Total Positions: {len(open_positions)}")
-    print(f"   Successfully Closed: {len(closed_positions)}")
-    print(f"   Failed: {len(failed_positions)}")
+            try:
+                order_result = future.result()
+                record_closed(params, order_result.get("orderId"))
+            except Exception as error:
+                print(f"   ❌ Failed to close position: {error}")
+                failed_positions.append({
+                    "symbol": params["symbol"],
+                    "side": params["side"],
+                    "quantity": params["order_quantity"],
+                    "error": str(error),
+                    "status": "failed"
+                })
+    
+    # Build the summary and print it in one write
+    lines = [
+        "\n" + "=" * 100,
+        "\n📝 Closing Summary:",
+        f"   Total Positions: {len(open_positions)}",
+        f"   Successfully Closed: {len(closed_positions)}",
+        f"   Failed: {len(failed_positions)}",
+    ]
     
     if closed_positions:
-        print("\n✅ Successfully Closed Positions:")
+        lines.append("\n✅ Successfully Closed Positions:")
         for pos in closed_positions:
-            print(f"   - {pos['symbol']}: {pos['side']} {pos['quantity']} (Order ID: {pos['orderId']})")
+            lines.append(f"   - {pos['symbol']}: {pos['side']} {pos['quantity']} (Order ID: {pos['orderId']})")
     
     if failed_positions:
-        print("\n❌ Failed to Close Positions:")
+        lines.append("\n❌ Failed to Close Positions:")
         for pos in failed_positions:
-            print(f"   - {pos['symbol']}: {pos['side']} {pos['quantity']} - Error: {pos['error']}")
+            lines.append(f"   - {pos['symbol']}: {pos['side']} {pos['quantity']} - Error: {pos['error']}")
+    
+    print("\n".join(lines))
     
     return {
         "success": len(failed_positions) == 0,
@@ -4,9 +4,10 @@ Creates an Agentic wallet using Privy
 import os
 import sys
 import argparse
-import base64
+import orjson
 from dotenv import load_dotenv
-import requests
+from http_client import SESSION
+from privy_utils import get_privy_headers
 
 load_dotenv()
 
@@ -58,24 +59,16 @@ def create_agentic_wallet(policy_id: str = None, chain_type: str = "ethereum") -
     print(f"Wallet configuration: {wallet_data}")
     
     # Create the agentic wallet using Privy API
-    auth_string = f"{app_id}:{app_secret}"
-    encoded_auth = base64.b64encode(auth_string.encode()).decode()
-    headers = {
-        "Authorization": f"Basic {encoded_auth}",
-        "privy-app-id": app_id,
-        "Content-Type": "application/json",
-    }
-    
-    response = requests.post(
+    response = SESSION.post(
         f"{PRIVY_API_BASE}/wallets",
-        headers=headers,
+        headers=get_privy_headers(app_id, app_secret),
         json=wallet_data
     )
     
     if not response.ok:
-        raise Exception(f"Failed to create wallet: {response.text}")
+        raise Exception(f"Failed to create wallet ({response.status_code}): {response.text}")
     
-    wallet = response.json()
+    wallet = orjson.loads(response.content)
     
     print("✅ Agentic wallet created successfully!")
     print(f"Wallet details: {wallet}")
@@ -2,83 +2,197 @@
 Create an order on Orderly Network using Privy agentic wallet
 Based on Orderly documentation: https://orderly.network/docs/build-on-omnichain/evm-api/restful-api/private/create-order
 """
-import os
 import sys
 import argparse
+import copy
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Tuple
+import orjson
 from dotenv import load_dotenv
-from web3 import Web3
-from orderly_auth import create_authenticated_request, hex_to_private_key
-import requests
-from privy_utils import get_account_id, get_wallet_address
-from orderly_constants import ORDERLY_API_URL, BROKER_ID
-from orderly_db import get_orderly_keys_or_raise
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from orderly_auth import create_authenticated_request
+from orderly_constants import (
+    ORDERLY_API_URL,
+    ORDER_RATE_LIMIT_PER_SECOND,
+    MAX_CONCURRENT_ORDER_REQUESTS,
+    MAX_BATCH_ORDER_SIZE,
+)
+from orderly_client import OrderlyAccount, get_orderly_account
+from http_client import RateLimiter, SESSION
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
 
-def create_order(
-    wallet_id: str,
-    symbol: str = None,
-    order_type: str = None,
-    side: str = None,
+# Accepted order types and sides
+VALID_ORDER_TYPES = frozenset(("LIMIT", "MARKET", "IOC", "FOK", "POST_ONLY", "ASK", "BID"))
+VALID_SIDES = frozenset(("BUY", "SELL"))
+
+# Order types that must carry an order price
+PRICED_ORDER_TYPES = frozenset(("LIMIT", "IOC", "FOK", "POST_ONLY"))
+
+# Recent orders sent with a client_order_id, keyed by (wallet_id, client_order_id); each
+# Future is pending while the order is in flight and holds its result once it succeeds
+SUBMITTED_ORDER_CACHE_SIZE = 4096
+
+_SUBMITTED_ORDERS: "OrderedDict[Tuple[str, str], Future]" = OrderedDict()
+_SUBMITTED_ORDERS_LOCK = threading.Lock()
+
+
+def validate_order(
+    symbol: str,
+    order_type: str,
+    side: str,
     order_price: float = None,
     order_quantity: float = None,
     order_amount: float = None,
-    visible_quantity: float = None,
-    reduce_only: bool = False,
-    slippage: float = None,
-    client_order_id: str = None,
-    order_tag: str = None,
-    level: int = None,
-) -> dict:
-    """Create an order on Orderly Network"""
-    app_id = os.getenv("PRIVY_APP_ID")
-    app_secret = os.getenv("PRIVY_APP_SECRET")
-    
-    if not app_id or not app_secret:
-        raise ValueError("Missing PRIVY_APP_ID or PRIVY_APP_SECRET")
-    if not wallet_id:
-        raise ValueError("Wallet ID is required")
-    
-    # Get Orderly keys from database
-    orderly_key, orderly_private_key_hex = get_orderly_keys_or_raise(wallet_id)
-    orderly_private_key = hex_to_private_key(orderly_private_key_hex)
-    
-    print("Fetching wallet details...")
-    wallet_address = get_wallet_address(wallet_id, app_id, app_secret)
-    print(f"   Wallet Address: {wallet_address}")
-    
-    account_id = get_account_id(wallet_address, BROKER_ID)
-    
+) -> None:
+    """Validate order fields, raising ValueError on the first problem"""
     # Validate required fields
     if not symbol or not order_type or not side:
         raise ValueError("Missing required fields: symbol, orderType, and side are required")
     
     # Validate order type
-    valid_order_types = ["LIMIT", "MARKET", "IOC", "FOK", "POST_ONLY", "ASK", "BID"]
-    if order_type.upper() not in valid_order_types:
-        raise ValueError(f"Invalid order type: {order_type}. Must be one of: {', '.join(valid_order_types)}")
+    order_type_upper = order_type.upper()
+    if order_type_upper not in VALID_ORDER_TYPES:
+        raise ValueError(f"Invalid order type: {order_type}. Must be one of: {', '.join(sorted(VALID_ORDER_TYPES))}")
     
     # Validate side
-    if side.upper() not in ["BUY", "SELL"]:
+    if side.upper() not in VALID_SIDES:
         raise ValueError(f"Invalid side: {side}. Must be BUY or SELL")
     
     # Validate order_price requirement
-    order_type_upper = order_type.upper()
-    if order_type_upper in ["LIMIT", "IOC", "FOK", "POST_ONLY"] and order_price is None:
+    if order_type_upper in PRICED_ORDER_TYPES and order_price is None:
         raise ValueError(f"orderPrice is required for {order_type} orders")
     
     # Validate order_quantity or order_amount
     if order_quantity is None and order_amount is None:
         raise ValueError("Either orderQuantity or orderAmount must be provided")
+
+
+def _claim_submitted_order(key: Tuple[str, str]) -> Tuple[Future, bool]:
+    """
+    Get the Future holding the result of an order sent with this client order ID
+    
+    The lookup and the claim happen under one lock, so of several concurrent calls
+    with the same key exactly one gets claimed=True and sends the order; the others
+    wait on its Future.
+    
+    Returns:
+        Tuple of (future, claimed)
+    """
+    with _SUBMITTED_ORDERS_LOCK:
+        future = _SUBMITTED_ORDERS.get(key)
+        if future is not None:
+            _SUBMITTED_ORDERS.move_to_end(key)
+            return future, False
+        
+        future = Future()
+        _SUBMITTED_ORDERS[key] = future
+        
+        # Evict the least recently used finished orders when full; in-flight ones must stay
+        excess = len(_SUBMITTED_ORDERS) - SUBMITTED_ORDER_CACHE_SIZE
+        if excess > 0:
+            for old_key in [old_key for old_key, old in _SUBMITTED_ORDERS.items() if old.done()][:excess]:
+                del _SUBMITTED_ORDERS[old_key]
+        return future, True
+
+
+def _forget_submitted_order(key: Tuple[str, str], future: Future) -> None:
+    """Drop a failed order so the same client order ID can be sent again"""
+    with _SUBMITTED_ORDERS_LOCK:
+        if _SUBMITTED_ORDERS.get(key) is future:
+            del _SUBMITTED_ORDERS[key]
+
+
+def send_order(account: OrderlyAccount, request_body: dict) -> dict:
+    """
+    Send a single create order request using already-resolved account credentials
+    
+    Args:
+        account: Credentials from get_orderly_account
+        request_body: Order request body as accepted by /v1/order (enums upper-case)
+        
+    Returns:
+        Order result with order ID, client order ID, wallet address and account ID
+    """
+    wallet_address = account.wallet_address
+    account_id = account.account_id
+    
+    logger.info("Preparing order creation...")
+    logger.info("   Wallet Address: %s", wallet_address)
+    logger.info("   Account ID: %s", account_id)
+    logger.info("   Symbol: %s", request_body["symbol"])
+    logger.info("   Order Type: %s", request_body["order_type"])
+    logger.info("   Side: %s", request_body["side"])
+    logger.info("Order parameters: %s", request_body)
+    
+    path = "/v1/order"
+    request_config = create_authenticated_request(
+        "POST",
+        path,
+        request_body,
+        account_id,
+        account.orderly_key,
+        account.signing_key
+    )
+    
+    response = SESSION.post(
+        f"{ORDERLY_API_URL}{path}",
+        headers=request_config["headers"],
+        data=request_config["body"]
+    )
+    
+    # Reject error responses before parsing the body
+    if not response.ok:
+        raise Exception(f"Failed to create order ({response.status_code}): {response.text}")
+    
+    data = orjson.loads(response.content)
+    
+    if not data.get("success"):
+        raise Exception(f"Order creation failed: {data}")
     
-    print("\nPreparing order creation...")
-    print(f"   Wallet ID: {wallet_id}")
-    print(f"   Wallet Address: {wallet_address}")
-    print(f"   Account ID: {account_id}")
-    print(f"   Symbol: {symbol}")
-    print(f"   Order Type: {order_type}")
-    print(f"   Side: {side}")
+    logger.info("✅ Order created successfully!")
+    logger.info("Response: %s", data)
+    
+    return {
+        "success": True,
+        "data": data.get("data"),
+        "orderId": data.get("data", {}).get("order_id"),
+        "clientOrderId": data.get("data", {}).get("client_order_id"),
+        "walletAddress": wallet_address,
+        "accountId": account_id,
+    }
+
+
+def create_order(
+    wallet_id: str,
+    symbol: str = None,
+    order_type: str = None,
+    side: str = None,
+    order_price: float = None,
+    order_quantity: float = None,
+    order_amount: float = None,
+    visible_quantity: float = None,
+    reduce_only: bool = False,
+    slippage: float = None,
+    client_order_id: str = None,
+    order_tag: str = None,
+    level: int = None,
+) -> dict:
+    """
+    Create an order on Orderly Network
+    
+    Orders sent with a client_order_id are remembered once they succeed; calling
+    again with the same wallet and client_order_id returns a copy of the earlier
+    result without sending the order a second time. A call made while the first
+    is still in flight waits for it. Failed orders are not remembered.
+    """
+    # Validate the order before any database or network work
+    validate_order(symbol, order_type, side, order_price, order_quantity, order_amount)
     
     # Build request body
     request_body = {
@@ -106,42 +220,122 @@ def create_order(
     if level is not None:
         request_body["level"] = level
     
-    print(f"\nOrder parameters: {request_body}")
+    if not client_order_id:
+        return send_order(get_orderly_account(wallet_id), request_body)
     
-    path = "/v1/order"
+    submitted_key = (wallet_id, client_order_id)
+    future, claimed = _claim_submitted_order(submitted_key)
+    
+    if not claimed:
+        logger.info("Order %s was already submitted; returning its result", client_order_id)
+        return copy.deepcopy(future.result())
+    
+    try:
+        result = send_order(get_orderly_account(wallet_id), request_body)
+    except BaseException as error:
+        _forget_submitted_order(submitted_key, future)
+        future.set_exception(error)
+        raise
+    
+    future.set_result(result)
+    return copy.deepcopy(result)
+
+
+def create_orders_batch(
+    account_id: str,
+    orderly_key: str,
+    signing_key: Ed25519PrivateKey,
+    orders: list
+) -> list:
+    """
+    Create up to MAX_BATCH_ORDER_SIZE orders with a single batch order request
+    
+    Returns:
+        Result rows from Orderly, in the same order as the submitted orders
+    """
+    path = "/v1/batch-order"
     request_config = create_authenticated_request(
         "POST",
         path,
-        request_body,
+        {"orders": orders},
         account_id,
         orderly_key,
-        orderly_private_key
+        signing_key
     )
     
-    response = requests.post(
+    response = SESSION.post(
         f"{ORDERLY_API_URL}{path}",
         headers=request_config["headers"],
         data=request_config["body"]
     )
     
-    data = response.json()
-    
+    # Reject error responses before parsing the body
     if not response.ok:
-        raise Exception(f"Failed to create order: {data}")
+        raise Exception(f"Failed to create batch orders ({response.status_code}): {response.text}")
+    
+    data = orjson.loads(response.content)
     
     if not data.get("success"):
-        raise Exception(f"Order creation failed: {data}")
+        raise Exception(f"Batch order creation failed: {data}")
+    
+    return data.get("data", {}).get("rows", [])
+
+
+def create_orders(wallet_id: str, orders: List[dict]) -> dict:
+    """
+    Create several orders with batch order requests
     
-    print("\n✅ Order created successfully!")
-    print(f"Response: {data}")
+    Orders are sent MAX_BATCH_ORDER_SIZE at a time, one signed request per batch,
+    with batches submitted concurrently within Orderly's rate limit.
+    
+    Args:
+        wallet_id: The Privy wallet ID (required)
+        orders: Order request bodies as accepted by /v1/order (symbol, order_type, side, ...);
+                order_type and side may be in any case
+        
+    Returns:
+        Result rows from Orderly, in the same order as the submitted orders
+    """
+    if not orders:
+        raise ValueError("At least one order is required")
+    
+    # Orderly only accepts upper-case enums, so normalize them like create_order does
+    orders = [
+        {
+            **order,
+            "order_type": (order.get("order_type") or "").upper(),
+            "side": (order.get("side") or "").upper(),
+        }
+        for order in orders
+    ]
+    for order in orders:
+        validate_order(
+            order.get("symbol"),
+            order.get("order_type"),
+            order.get("side"),
+            order.get("order_price"),
+            order.get("order_quantity"),
+            order.get("order_amount"),
+        )
+    
+    account = get_orderly_account(wallet_id)
+    
+    batches = [orders[i:i + MAX_BATCH_ORDER_SIZE] for i in range(0, len(orders), MAX_BATCH_ORDER_SIZE)]
+    rate_limiter = RateLimiter(ORDER_RATE_LIMIT_PER_SECOND)
+    
+    def submit_batch(batch):
+        rate_limiter.wait()
+        return create_orders_batch(account.account_id, account.orderly_key, account.signing_key, batch)
+    
+    logger.info("Creating %d order(s) in %d batch request(s)...", len(orders), len(batches))
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_ORDER_REQUESTS) as executor:
+        rows = [row for batch_rows in executor.map(submit_batch, batches) for row in batch_rows]
     
     return {
         "success": True,
-        "data": data.get("data"),
-        "orderId": data.get("data", {}).get("order_id"),
-        "clientOrderId": data.get("data", {}).get("client_order_id"),
-        "walletAddress": wallet_address,
-        "accountId": account_id,
+        "rows": rows,
+        "walletAddress": account.wallet_address,
+        "accountId": account.account_id,
     }
 
 
@@ -163,6 +357,9 @@ def main():
     
     args = parser.parse_args()
     
+    # Progress details are logged; show them on the terminal when run as a script
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     try:
         result = create_order(
             wallet_id=args.wallet_id,
@@ -1,71 +1,143 @@
 """
 Deposit USDC to Orderly account using Privy agentic wallet
 """
-import os
 import sys
 import argparse
+import time
+import functools
+from dataclasses import dataclass
 from dotenv import load_dotenv
-from web3 import Web3
-from eth_utils import keccak, to_hex
-from privy import PrivyAPI
-from privy_utils import get_account_id, get_wallet_address
+from eth_utils import keccak, to_checksum_address, to_hex
+from privy_utils import BROKER_ID_HASH, get_account_id, get_wallet_address, get_privy_client
+from http_client import SESSION
+from orderly_config import get_privy_config
 
 from orderly_constants import ORDERLY_API_URL, CHAIN_ID, BROKER_ID
 
 load_dotenv()
 
-# USDC token addresses
-USDC_ADDRESSES = {
-    1: "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48",
-    11155111: "0x1c7D4B196Cb0C7B01d743Fbc6116a902379C7238",
-    42161: "0xaf88d065e77c8cC2239327C5EDb3A432268e5831",
-    421614: "0x75faf114eafb1BDbe2F0316DF893fd58CE46AA4d",
-    10: "0x0b2c639c533813f4aa9d7837caf62653d097ff85",
-    11155420: "0x5fd84259d66Cd46123540766Be93DFE6D43130D7",
-    8453: "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913",
-    84532: "0x036CbD53842c5426634e7929541eC2318f3dCF7e",
-    5000: "0x09bc4e0d864854c6afb6eb9a9cdf58ac190d0df9",
-    5003: "0xAcab8129E2cE587fD203FD770ec9ECAFA2C88080",
-    56: "0x8AC76a51cc950d9822D68b83fE1Ad97B32Cd580d",
-    97: "0x31873b5804bABE258d6ea008f55e08DD00b7d51E",
-    137: "0x3c499c542cEF5E3811e1192ce70d8cC03d5c3359",
-    80001: "0x41e94eb019c0762f9bfcf9fb1f3f082b1e1e2079",
-}
+# Attempts to read the allowance at the approval block before giving up
+ALLOWANCE_VERIFY_ATTEMPTS = 8
 
-# Orderly Vault contract addresses
-ORDERLY_VAULT = {
-    1: "0x816f722424b49cf1275cc86da9840fbd5a6167e9",
-    11155111: "0x0EaC556c0C2321BA25b9DC01e4e3c95aD5CDCd2f",
-    42161: "0x816f722424B49Cf1275cc86DA9840Fbd5a6167e9",
-    421614: "0x0EaC556c0C2321BA25b9DC01e4e3c95aD5CDCd2f",
-    10: "0x816f722424b49cf1275cc86da9840fbd5a6167e9",
-    11155420: "0xEfF2896077B6ff95379EfA89Ff903598190805EC",
-    8453: "0x816f722424b49cf1275cc86da9840fbd5a6167e9",
-    84532: "0xdc7348975aE9334DbdcB944DDa9163Ba8406a0ec",
-    5000: "0x816f722424b49cf1275cc86da9840fbd5a6167e9",
-    5003: "0xfb0E5f3D16758984E668A3d76f0963710E775503",
-    56: "0x816f722424B49Cf1275cc86DA9840Fbd5a6167e9",
-    97: "0xaf2036D5143219fa00dDd90e7A2dbF3E36dba050",
-    137: "0x816f722424b49cf1275cc86da9840fbd5a6167e9",
-    80001: "0x816f722424b49cf1275cc86da9840fbd5a6167e9",
+# Initial receipt polling interval in seconds, roughly matched to each chain's block time
+RECEIPT_POLL_INTERVALS = {
+    1: 1.0,
+    11155111: 1.0,
+    42161: 0.1,
+    421614: 0.1,
+    10: 0.25,
+    11155420: 0.25,
+    8453: 0.25,
+    84532: 0.25,
+    5000: 0.25,
+    5003: 0.25,
+    56: 0.5,
+    97: 0.5,
+    137: 0.5,
+    80001: 0.5,
 }
+DEFAULT_RECEIPT_POLL_INTERVAL = 0.5
+MAX_RECEIPT_POLL_INTERVAL = 2.0
+RECEIPT_TIMEOUT_SECONDS = 120
+
+# Timeout for individual JSON-RPC requests
+RPC_TIMEOUT_SECONDS = 30
+
+
+@dataclass(frozen=True)
+class ChainConfig:
+    """Per-chain deposit configuration (addresses are checksummed at import)"""
+    usdc: str
+    vault: str
+    rpc: str
+    decimals: int
+
+
+def _chain_config(usdc: str, vault: str, rpc: str, decimals: int = 6) -> ChainConfig:
+    """Build a ChainConfig, checksumming the contract addresses once"""
+    return ChainConfig(
+        usdc=to_checksum_address(usdc),
+        vault=to_checksum_address(vault),
+        rpc=rpc,
+        decimals=decimals,
+    )
 
-# RPC URLs
-RPC_URLS = {
-    1: "https://rpc.ankr.com/eth",
-    11155111: "https://rpc.ankr.com/eth_sepolia",
-    42161: "https://arb1.arbitrum.io/rpc",
-    421614: "https://sepolia-rollup.arbitrum.io/rpc",
-    10: "https://mainnet.optimism.io",
-    11155420: "https://sepolia.optimism.io",
-    8453: "https://mainnet.base.org",
-    84532: "https://sepolia.base.org",
-    5000: "https://rpc.mantle.xyz",
-    5003: "https://rpc.sepolia.mantle.xyz",
-    56: "https://bsc-dataseed.binance.org/",
-    97: "https://data-seed-prebsc-1-s1.binance.org:8545/",
-    137: "https://polygon-rpc.com",
-    80001: "https://rpc.ankr.com/polygon_mumbai",
+
+# USDC token, Orderly Vault, RPC URL and USDC decimals per chain
+# USDC uses 6 decimals everywhere except the Binance-Peg token on BSC (18)
+CHAIN_CONFIG = {
+    1: _chain_config(  # Ethereum
+        "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48",
+        "0x816f722424b49cf1275cc86da9840fbd5a6167e9",
+        "https://rpc.ankr.com/eth",
+    ),
+    11155111: _chain_config(  # Sepolia
+        "0x1c7D4B196Cb0C7B01d743Fbc6116a902379C7238",
+        "0x0EaC556c0C2321BA25b9DC01e4e3c95aD5CDCd2f",
+        "https://rpc.ankr.com/eth_sepolia",
+    ),
+    42161: _chain_config(  # Arbitrum
+        "0xaf88d065e77c8cC2239327C5EDb3A432268e5831",
+        "0x816f722424B49Cf1275cc86DA9840Fbd5a6167e9",
+        "https://arb1.arbitrum.io/rpc",
+    ),
+    421614: _chain_config(  # Arbitrum Sepolia
+        "0x75faf114eafb1BDbe2F0316DF893fd58CE46AA4d",
+        "0x0EaC556c0C2321BA25b9DC01e4e3c95aD5CDCd2f",
+        "https://sepolia-rollup.arbitrum.io/rpc",
+    ),
+    10: _chain_config(  # Optimism
+        "0x0b2c639c533813f4aa9d7837caf62653d097ff85",
+        "0x816f722424b49cf1275cc86da9840fbd5a6167e9",
+        "https://mainnet.optimism.io",
+    ),
+    11155420: _chain_config(  # Optimism Sepolia
+        "0x5fd84259d66Cd46123540766Be93DFE6D43130D7",
+        "0xEfF2896077B6ff95379EfA89Ff903598190805EC",
+        "https://sepolia.optimism.io",
+    ),
+    8453: _chain_config(  # Base
+        "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913",
+        "0x816f722424b49cf1275cc86da9840fbd5a6167e9",
+        "https://mainnet.base.org",
+    ),
+    84532: _chain_config(  # Base Sepolia
+        "0x036CbD53842c5426634e7929541eC2318f3dCF7e",
+        "0xdc7348975aE9334DbdcB944DDa9163Ba8406a0ec",
+        "https://sepolia.base.org",
+    ),
+    5000: _chain_config(  # Mantle
+        "0x09bc4e0d864854c6afb6eb9a9cdf58ac190d0df9",
+        "0x816f722424b49cf1275cc86da9840fbd5a6167e9",
+        "https://rpc.mantle.xyz",
+    ),
+    5003: _chain_config(  # Mantle Sepolia
+        "0xAcab8129E2cE587fD203FD770ec9ECAFA2C88080",
+        "0xfb0E5f3D16758984E668A3d76f0963710E775503",
+        "https://rpc.sepolia.mantle.xyz",
+    ),
+    56: _chain_config(  # BSC
+        "0x8AC76a51cc950d9822D68b83fE1Ad97B32Cd580d",
+        "0x816f722424B49Cf1275cc86DA9840Fbd5a6167e9",
+        "https://bsc-dataseed.binance.org/",
+        decimals=18,
+    ),
+    97: _chain_config(  # BSC Testnet
+        "0x31873b5804bABE258d6ea008f55e08DD00b7d51E",
+        "0xaf2036D5143219fa00dDd90e7A2dbF3E36dba050",
+        "https://data-seed-prebsc-1-s1.binance.org:8545/",
+        decimals=18,
+    ),
+    137: _chain_config(  # Polygon
+        "0x3c499c542cEF5E3811e1192ce70d8cC03d5c3359",
+        "0x816f722424b49cf1275cc86da9840fbd5a6167e9",
+        "https://polygon-rpc.com",
+    ),
+    80001: _chain_config(  # Polygon Mumbai
+        "0x41e94eb019c0762f9bfcf9fb1f3f082b1e1e2079",
+        "0x816f722424b49cf1275cc86da9840fbd5a6167e9",
+        "https://rpc.ankr.com/polygon_mumbai",
+    ),
 }
 
 # ERC20 ABI
@@ -148,14 +220,72 @@ VAULT_ABI = [
 ]
 
 
+# Deposit hashes are derived from constants, so compute them once at import
+BROKER_HASH_HEX = to_hex(BROKER_ID_HASH)
+TOKEN_HASH_HEX = to_hex(keccak(b"USDC"))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_contracts(chain_id: int):
+    """
+    Build the Web3 provider and USDC/Vault contract objects for a chain
+    Results are memoized per chain_id so ABIs are only parsed once per process,
+    and every provider shares the pooled keep-alive HTTP session
+    
+    Args:
+        chain_id: Chain ID present in CHAIN_CONFIG
+        
+    Returns:
+        Tuple of (w3, usdc_contract, vault_contract)
+    """
+    chain_config = CHAIN_CONFIG[chain_id]
+    # Imported here so the CLI starts without loading web3
+    from web3 import Web3
+    
+    w3 = Web3(Web3.HTTPProvider(
+        chain_config.rpc,
+        request_kwargs={"timeout": RPC_TIMEOUT_SECONDS},
+        session=SESSION,
+    ))
+    usdc_contract = w3.eth.contract(address=chain_config.usdc, abi=ERC20_ABI)
+    vault_contract = w3.eth.contract(address=chain_config.vault, abi=VAULT_ABI)
+    return w3, usdc_contract, vault_contract
+
+
+def wait_for_receipt(w3, tx_hash: str, chain_id: int) -> dict:
+    """
+    Wait for a transaction receipt, polling adaptively
+    
+    Polling starts at the chain's RECEIPT_POLL_INTERVALS entry and doubles up to
+    MAX_RECEIPT_POLL_INTERVAL, so fast chains confirm quickly while slow chains
+    are not hammered with receipt requests.
+    
+    Args:
+        w3: Web3 instance for the chain
+        tx_hash: Transaction hash to wait for
+        chain_id: Chain ID used to pick the initial polling interval
+        
+    Returns:
+        Transaction receipt
+    """
+    from web3.exceptions import TransactionNotFound
+    
+    interval = RECEIPT_POLL_INTERVALS.get(chain_id, DEFAULT_RECEIPT_POLL_INTERVAL)
+    deadline = time.monotonic() + RECEIPT_TIMEOUT_SECONDS
+    
+    while True:
+        try:
+            return w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            if time.monotonic() >= deadline:
+                raise Exception(f"Transaction {tx_hash} not mined after {RECEIPT_TIMEOUT_SECONDS} seconds")
+        time.sleep(interval)
+        interval = min(interval * 2, MAX_RECEIPT_POLL_INTERVAL)
+
 
 def send_transaction(wallet_id: str, transaction: dict, app_id: str, app_secret: str, authorization_secret: str, chain_id: int) -> dict:
     """Send transaction using PrivyAPI"""
-    client = PrivyAPI(
-        app_id=app_id,
-        app_secret=app_secret
-    )
-    client.update_authorization_key(authorization_secret)
+    client = get_privy_client(app_id, app_secret, authorization_secret)
     
     result = client.wallets.rpc(
         wallet_id=wallet_id,
@@ -175,11 +305,23 @@ def send_transaction(wallet_id: str, transaction: dict, app_id: str, app_secret:
         return {"transaction_hash": str(result), "hash": str(result), "status": "pending"}
 
 
-def deposit_usdc(wallet_id: str, amount: str = None, chain_id: int = None) -> dict:
-    """Deposit USDC to Orderly account"""
-    app_id = os.getenv("PRIVY_APP_ID")
-    app_secret = os.getenv("PRIVY_APP_SECRET")
-    authorization_secret = os.getenv("PRIVY_AUTHORIZATION_SECRET")
+def deposit_usdc(wallet_id: str, amount: str = None, chain_id: int = None, verify_decimals: bool = False) -> dict:
+    """
+    Deposit USDC to Orderly account
+    
+    Args:
+        wallet_id: The Privy wallet ID (required)
+        amount: Amount of USDC to deposit (required)
+        chain_id: The chain ID (optional, defaults to CHAIN_ID)
+        verify_decimals: Check the configured USDC decimals against the token contract
+        
+    Returns:
+        Deposit result with transaction hash and block number
+    """
+    config = get_privy_config()
+    app_id = config.app_id
+    app_secret = config.app_secret
+    authorization_secret = config.authorization_secret
     
     if not app_id or not app_secret:
         raise ValueError("Missing PRIVY_APP_ID or PRIVY_APP_SECRET")
@@ -205,24 +347,30 @@ def deposit_usdc(wallet_id: str, amount: str = None, chain_id: int = None) -> di
     print(f"   Chain ID: {chain_id} ({chain_id_hex})")
     
     # Get contract addresses
-    usdc_address = USDC_ADDRESSES.get(chain_id)
-    if not usdc_address:
-        raise ValueError(f"USDC address not configured for chain ID {chain_id}")
+    chain_config = CHAIN_CONFIG.get(chain_id)
+    if not chain_config:
+        raise ValueError(f"Chain ID {chain_id} is not configured for deposits")
     
-    vault_address = ORDERLY_VAULT.get(chain_id)
-    if not vault_address:
-        raise ValueError(f"Orderly Vault address not configured for chain ID {chain_id}")
+    usdc_address = chain_config.usdc
+    vault_address = chain_config.vault
     
-    rpc_url = RPC_URLS.get(chain_id)
-    if not rpc_url:
-        raise ValueError(f"RPC URL not configured for chain ID {chain_id}")
+    # Get cached provider and contracts for this chain
+    w3, usdc_contract, vault_contract = _get_contracts(chain_id)
     
-    # Create provider
-    w3 = Web3(Web3.HTTPProvider(rpc_url))
-    usdc_contract = w3.eth.contract(address=usdc_address, abi=ERC20_ABI)
+    # Read balance and allowance (and decimals if verifying) in a single JSON-RPC batch request
+    decimals = chain_config.decimals
+    with w3.batch_requests() as batch:
+        batch.add(usdc_contract.functions.balanceOf(wallet_address))
+        batch.add(usdc_contract.functions.allowance(wallet_address, vault_address))
+        if verify_decimals:
+            batch.add(usdc_contract.functions.decimals())
+        balance, current_allowance, *onchain_decimals = batch.execute()
+    
+    if verify_decimals and onchain_decimals[0] != decimals:
+        raise ValueError(
+            f"USDC decimals mismatch for chain ID {chain_id}: configured {decimals}, contract reports {onchain_decimals[0]}"
+        )
     
-    # Get decimals
-    decimals = usdc_contract.functions.decimals().call()
     print(f"   USDC decimals: {decimals}")
     
     # Convert amount
@@ -230,14 +378,12 @@ def deposit_usdc(wallet_id: str, amount: str = None, chain_id: int = None) -> di
     print(f"   Amount in smallest unit: {amount_wei}")
     
     # Check balance
-    balance = usdc_contract.functions.balanceOf(wallet_address).call()
     print(f"   Current USDC balance: {balance / (10 ** decimals)}")
     
     if balance < amount_wei:
         raise ValueError(f"Insufficient balance. Required: {amount}, Available: {balance / (10 ** decimals)}")
     
     # Check and approve if needed
-    current_allowance = usdc_contract.functions.allowance(wallet_address, vault_address).call()
     print(f"   Current allowance: {current_allowance / (10 ** decimals)}")
     
     if current_allowance < amount_wei:
@@ -257,45 +403,52 @@ def deposit_usdc(wallet_id: str, amount: str = None, chain_id: int = None) -> di
         print(f"   Approval transaction hash: {tx_hash}")
         print("   Waiting for approval confirmation...")
         
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        receipt = wait_for_receipt(w3, tx_hash, chain_id)
         print(f"   Approval confirmed in block: {receipt['blockNumber']}")
         
-        # Verify allowance
-        import time
-        for i in range(10):
-            verified_allowance = usdc_contract.functions.allowance(wallet_address, vault_address).call()
-            if verified_allowance >= amount_wei:
-                print("   Allowance verified")
+        # The approval is final at its receipt block, so a single allowance read there is enough.
+        # Retry with backoff only if the RPC node has not caught up to that block yet.
+        delay = 0.25
+        for i in range(ALLOWANCE_VERIFY_ATTEMPTS):
+            try:
+                verified_allowance = usdc_contract.functions.allowance(wallet_address, vault_address).call(
+                    block_identifier=receipt["blockNumber"]
+                )
                 break
-            if i == 9:
-                raise Exception("Allowance verification failed")
-            time.sleep(1)
+            except Exception as error:
+                if i == ALLOWANCE_VERIFY_ATTEMPTS - 1:
+                    raise Exception(f"Allowance verification failed: {error}")
+                time.sleep(delay)
+                delay = min(delay * 2, 2.0)
+        
+        if verified_allowance < amount_wei:
+            raise Exception(
+                f"Allowance verification failed. Required: {amount_wei}, Approved: {verified_allowance}"
+            )
+        print("   Allowance verified")
     else:
         print("   Sufficient allowance already exists")
     
     # Prepare deposit data
     orderly_account_id = get_account_id(wallet_address, BROKER_ID)
-    broker_hash = keccak(BROKER_ID.encode())
-    token_hash = keccak(b"USDC")
     token_amount = amount_wei & 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF  # uint128
     
     deposit_data = {
         "accountId": orderly_account_id,
-        "brokerHash": to_hex(broker_hash),
-        "tokenHash": to_hex(token_hash),
+        "brokerHash": BROKER_HASH_HEX,
+        "tokenHash": TOKEN_HASH_HEX,
         "tokenAmount": token_amount,
     }
     
     print("\nDeposit data prepared:")
     print(f"   Account ID: {orderly_account_id}")
-    print(f"   Broker Hash: {to_hex(broker_hash)}")
-    print(f"   Token Hash: {to_hex(token_hash)}")
+    print(f"   Broker Hash: {BROKER_HASH_HEX}")
+    print(f"   Token Hash: {TOKEN_HASH_HEX}")
     print(f"   Token Amount: {token_amount}")
     
     # Get deposit fee
-    vault_contract = w3.eth.contract(address=vault_address, abi=VAULT_ABI)
     deposit_fee = vault_contract.functions.getDepositFee(wallet_address, deposit_data).call()
-    print(f"\nCalculating deposit fee...")
+    print("\nCalculating deposit fee...")
     print(f"   Deposit fee: {deposit_fee / 1e18} ETH")
     
     # Encode deposit function
@@ -321,7 +474,7 @@ def deposit_usdc(wallet_id: str, amount: str = None, chain_id: int = None) -> di
     print(f"   Transaction hash: {tx_hash}")
     print("   Waiting for transaction confirmation...")
     
-    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    receipt = wait_for_receipt(w3, tx_hash, chain_id)
     print(f"   Transaction confirmed in block: {receipt['blockNumber']}")
     print("\n✅ USDC deposit successful!")
     
@@ -342,6 +495,7 @@ def main():
     parser.add_argument("--wallet-id", required=True, help="Privy wallet ID to use (required)")
     parser.add_argument("--amount", required=True, help="Amount of USDC to deposit (required, e.g., '100')")
     parser.add_argument("--chain-id", type=int, help="Chain ID (optional, default: 80001 = Polygon Mumbai)")
+    parser.add_argument("--verify-decimals", action="store_true", help="Check configured USDC decimals against the token contract")
     
     args = parser.parse_args()
     
@@ -349,7 +503,8 @@ def main():
         result = deposit_usdc(
             wallet_id=args.wallet_id,
             amount=args.amount,
-            chain_id=args.chain_id
+            chain_id=args.chain_id,
+            verify_decimals=args.verify_decimals
         )
         
         print("\n📝 Deposit Summary:")
@@ -0,0 +1,147 @@
+"""
+Get holding, open orders and positions from Orderly account in one call
+Based on Orderly documentation: https://orderly.network/docs/build-on-omnichain/evm-api/restful-api/private/get-current-holding
+"""
+import sys
+import argparse
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Sequence
+from dotenv import load_dotenv
+from orderly_constants import ORDER_RATE_LIMIT_PER_SECOND, MAX_CONCURRENT_ORDER_REQUESTS
+from orderly_client import OrderlyAccount, get_orderly_account, orderly_get
+from http_client import RateLimiter
+
+load_dotenv()
+
+# Snapshot sections and the Orderly endpoint each one is read from
+SNAPSHOT_PATHS = {
+    "holding": "/v1/client/holding",
+    "orders": "/v1/orders?status=INCOMPLETE",
+    "positions": "/v1/positions",
+}
+
+# Maximum page size for the open orders listing
+ORDERS_PAGE_SIZE = 500
+
+
+def _fetch_open_orders(account: OrderlyAccount) -> dict:
+    """
+    Fetch every open order, paging through the listing like cancel_all_orders
+    
+    Returns:
+        Orders data with all rows and the meta of the first page
+    """
+    rate_limiter = RateLimiter(ORDER_RATE_LIMIT_PER_SECOND)
+    
+    def fetch_page(page):
+        rate_limiter.wait()
+        return orderly_get(f"{SNAPSHOT_PATHS['orders']}&page={page}&size={ORDERS_PAGE_SIZE}", account, "get orders").get("data", {})
+    
+    # The first page tells us how many pages there are in total
+    first_page = fetch_page(1)
+    rows = list(first_page.get("rows", []))
+    meta = first_page.get("meta", {})
+    
+    records_per_page = meta.get("records_per_page") or ORDERS_PAGE_SIZE
+    total_pages = math.ceil(meta.get("total", len(rows)) / records_per_page) if rows else 1
+    
+    # Fetch the remaining pages concurrently, keeping rows in page order
+    if total_pages > 1:
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_ORDER_REQUESTS) as executor:
+            for page in executor.map(fetch_page, range(2, total_pages + 1)):
+                rows.extend(page.get("rows", []))
+    
+    return {**first_page, "rows": rows, "meta": meta}
+
+
+def get_account_snapshot(wallet_id: str, include: Optional[Sequence[str]] = None) -> dict:
+    """
+    Get several views of an Orderly account at once
+    
+    The wallet address, account ID and signing key are resolved once, then every
+    requested section is fetched concurrently over the shared session. Open orders
+    are paged through, so the snapshot holds all of them.
+    
+    Args:
+        wallet_id: The Privy wallet ID (required)
+        include: Sections to fetch: "holding", "orders" (open orders) and/or "positions" (default: all)
+        
+    Returns:
+        Snapshot with the response data of each requested section
+    """
+    sections = list(dict.fromkeys(include or SNAPSHOT_PATHS))
+    unknown = [section for section in sections if section not in SNAPSHOT_PATHS]
+    if unknown:
+        raise ValueError(f"Invalid snapshot section(s): {', '.join(unknown)}. Must be one of: {', '.join(SNAPSHOT_PATHS)}")
+    
+    account = get_orderly_account(wallet_id)
+    
+    print(f"\nFetching {', '.join(sections)} from Orderly...")
+    print(f"   Account ID: {account.account_id}")
+    
+    def fetch_section(section):
+        if section == "orders":
+            return _fetch_open_orders(account)
+        return orderly_get(SNAPSHOT_PATHS[section], account, f"get {section}").get("data")
+    
+    with ThreadPoolExecutor(max_workers=len(sections)) as executor:
+        results = list(executor.map(fetch_section, sections))
+    
+    return {
+        "success": True,
+        **dict(zip(sections, results)),
+        "walletAddress": account.wallet_address,
+        "accountId": account.account_id,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Get holding, open orders and positions from Orderly account")
+    parser.add_argument("--wallet-id", required=True, help="Privy wallet ID to use (required)")
+    parser.add_argument("--include", default=",".join(SNAPSHOT_PATHS),
+                        help="Comma-separated sections to fetch: holding, orders, positions (default: all)")
+    
+    args = parser.parse_args()
+    
+    try:
+        result = get_account_snapshot(
+            wallet_id=args.wallet_id,
+            include=[section.strip() for section in args.include.split(",") if section.strip()]
+        )
+        
+        lines = [
+            "\n📊 Account Snapshot:",
+            f"   Wallet Address: {result['walletAddress']}",
+            f"   Account ID: {result['accountId']}",
+        ]
+        if "holding" in result:
+            lines.append("\n💰 Holdings:")
+            for item in result["holding"].get("holding", []):
+                lines.append(f"   {item.get('token', 'N/A')}: {item.get('holding', 0)} (frozen: {item.get('frozen', 0)})")
+        if "orders" in result:
+            orders = result["orders"].get("rows", [])
+            lines.append(f"\n📋 Open Orders: {len(orders)}")
+            for order in orders:
+                lines.append(
+                    f"   #{order.get('order_id')} {order.get('symbol', 'N/A')} {order.get('side', 'N/A')} "
+                    f"{order.get('type', 'N/A')} {order.get('quantity', 0)} @ {order.get('price', 0)}"
+                )
+        if "positions" in result:
+            positions = [row for row in result["positions"].get("rows", []) if row.get("position_qty")]
+            lines.append(f"\n📈 Open Positions: {len(positions)}")
+            for position in positions:
+                lines.append(
+                    f"   {position.get('symbol', 'N/A')}: {position.get('position_qty')} "
+                    f"@ {position.get('average_open_price', 0)} (uPnL: {position.get('unsettled_pnl', 0)})"
+                )
+        print("\n".join(lines))
+        
+        sys.exit(0)
+    except Exception as error:
+        print(f"\n❌ Failed to get account snapshot: {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
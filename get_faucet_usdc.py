@@ -8,9 +8,10 @@ This script calls the EVM faucet endpoint:
 """
 import argparse
 import sys
-import requests
+import orjson
 
 from orderly_constants import BROKER_ID
+from http_client import SESSION
 
 # Testnet faucet endpoint (EVM)
 FAUCET_URL = "https://testnet-operator-evm.orderly.org/v1/faucet/usdc"
@@ -46,8 +47,12 @@ def get_faucet_usdc(user_address: str, chain_id: str, broker_id: str = None) ->
     print(f"   User Addr  : {user_address}")
     print(f"   Broker ID  : {broker_id}")
 
-    response = requests.post(FAUCET_URL, json=payload)
-    data = response.json()
+    response = SESSION.post(
+        FAUCET_URL,
+        data=orjson.dumps(payload),
+        headers={"Content-Type": "application/json"},
+    )
+    data = orjson.loads(response.content)
 
     if not response.ok:
         raise Exception(f"Faucet request failed ({response.status_code}): {data}")
@@ -2,17 +2,13 @@
 Get orders from Orderly account
 Based on Orderly documentation: https://orderly.network/docs/build-on-omnichain/evm-api/restful-api/private/get-orders
 """
-import os
 import sys
 import argparse
+import contextlib
 from dotenv import load_dotenv
-from web3 import Web3
-from orderly_auth import create_authenticated_request, hex_to_private_key
-import requests
+import orjson
 from urllib.parse import urlencode
-from privy_utils import get_account_id, get_wallet_address
-from orderly_constants import ORDERLY_API_URL, BROKER_ID
-from orderly_db import get_orderly_keys_or_raise
+from orderly_client import get_orderly_account, orderly_get
 
 load_dotenv()
 
@@ -31,51 +27,29 @@ def get_orders(
     sort_by: str = None,
 ) -> dict:
     """Get orders from Orderly account"""
-    app_id = os.getenv("PRIVY_APP_ID")
-    app_secret = os.getenv("PRIVY_APP_SECRET")
-    
-    if not app_id or not app_secret:
-        raise ValueError("Missing PRIVY_APP_ID or PRIVY_APP_SECRET")
-    if not wallet_id:
-        raise ValueError("Wallet ID is required")
-    
-    # Get Orderly keys from database
-    orderly_key, orderly_private_key_hex = get_orderly_keys_or_raise(wallet_id)
-    orderly_private_key = hex_to_private_key(orderly_private_key_hex)
-    
-    print("Fetching wallet details...")
-    wallet_address = get_wallet_address(wallet_id, app_id, app_secret)
-    print(f"   Wallet Address: {wallet_address}")
-    
-    account_id = get_account_id(wallet_address, BROKER_ID)
+    account = get_orderly_account(wallet_id)
+    wallet_address = account.wallet_address
+    account_id = account.account_id
     
     print("\nFetching orders from Orderly...")
     print(f"   Wallet ID: {wallet_id}")
     print(f"   Wallet Address: {wallet_address}")
     print(f"   Account ID: {account_id}")
     
-    # Build query parameters
-    query_params = {}
-    if symbol:
-        query_params["symbol"] = symbol
-    if side:
-        query_params["side"] = side.upper()
-    if order_type:
-        query_params["order_type"] = order_type.upper()
-    if status:
-        query_params["status"] = status.upper()
-    if order_tag:
-        query_params["order_tag"] = order_tag
-    if start_time:
-        query_params["start_t"] = str(start_time)
-    if end_time:
-        query_params["end_t"] = str(end_time)
-    if page:
-        query_params["page"] = str(page)
-    if size:
-        query_params["size"] = str(size)
-    if sort_by:
-        query_params["sort_by"] = sort_by
+    # Build query parameters, skipping filters that were not given
+    query_params = {
+        "symbol": symbol,
+        "side": side.upper() if side else None,
+        "order_type": order_type.upper() if order_type else None,
+        "status": status.upper() if status else None,
+        "order_tag": order_tag,
+        "start_t": start_time,
+        "end_t": end_time,
+        "page": page,
+        "size": size,
+        "sort_by": sort_by,
+    }
+    query_params = {key: value for key, value in query_params.items() if value is not None and value != ""}
     
     query_string = urlencode(query_params)
     path = f"/v1/orders?{query_string}" if query_string else "/v1/orders"
@@ -83,29 +57,8 @@ def get_orders(
     if query_string:
         print(f"   Filters: {query_string}")
     
-    # Create authenticated request
-    request_config = create_authenticated_request(
-        "GET",
-        path,
-        None,
-        account_id,
-        orderly_key,
-        orderly_private_key
-    )
-    
-    # Make the request
-    response = requests.get(
-        f"{ORDERLY_API_URL}{path}",
-        headers=request_config["headers"]
-    )
-    
-    data = response.json()
-    
-    if not response.ok:
-        raise Exception(f"Failed to get orders: {data}")
-    
-    if not data.get("success"):
-        raise Exception(f"Orderly API returned error: {data}")
+    # Order pages can hold up to 500 rows; orderly_get parses the raw body with orjson
+    data = orderly_get(path, account, "get orders")
     
     print("\n✅ Orders retrieved successfully!")
     
@@ -133,66 +86,74 @@ def main():
     parser.add_argument("--page", type=int, default=1, help="Page number (starts from 1, default: 1)")
     parser.add_argument("--size", type=int, default=25, help="Page size (max: 500, default: 25)")
     parser.add_argument("--sort-by", help="Sort by: CREATED_TIME_DESC, CREATED_TIME_ASC, UPDATED_TIME_DESC, UPDATED_TIME_ASC")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON (progress messages go to stderr)")
     
     args = parser.parse_args()
     
     try:
-        result = get_orders(
-            wallet_id=args.wallet_id,
-            symbol=args.symbol,
-            side=args.side,
-            order_type=args.order_type,
-            status=args.status,
-            order_tag=args.order_tag,
-            start_time=args.start_time,
-            end_time=args.end_time,
-            page=args.page,
-            size=args.size,
-            sort_by=args.sort_by,
-        )
+        # Keep stdout clean for the JSON output
+        with contextlib.redirect_stdout(sys.stderr if args.json else sys.stdout):
+            result = get_orders(
+                wallet_id=args.wallet_id,
+                symbol=args.symbol,
+                side=args.side,
+                order_type=args.order_type,
+                status=args.status,
+                order_tag=args.order_tag,
+                start_time=args.start_time,
+                end_time=args.end_time,
+                page=args.page,
+                size=args.size,
+                sort_by=args.sort_by,
+            )
+        
+        if args.json:
+            print(orjson.dumps(result).decode())
+            sys.exit(0)
         
-        # Display orders
-        print("\n📋 Orders:")
-        print("=" * 100)
+        # Build the report and write it in one call
+        lines = ["\n📋 Orders:", "=" * 100]
         
         if not result["orders"]:
-            print("   No orders found.")
+            lines.append("   No orders found.")
         else:
             if result["meta"].get("total") is not None:
-                print(f"\nTotal Orders: {result['meta']['total']}")
+                lines.append(f"\nTotal Orders: {result['meta']['total']}")
                 total_pages = (result["meta"].get("total", 0) + result["meta"].get("records_per_page", 25) - 1) // result["meta"].get("records_per_page", 25)
-                print(f"Page: {result['meta'].get('current_page', 1)} of {total_pages}")
-                print(f"Records per page: {result['meta'].get('records_per_page', 25)}")
+                lines.append(f"Page: {result['meta'].get('current_page', 1)} of {total_pages}")
+                lines.append(f"Records per page: {result['meta'].get('records_per_page', 25)}")
             
             for index, order in enumerate(result["orders"], 1):
-                print(f"\n{index}. Order #{order.get('order_id')}:")
-                print(f"   Symbol: {order.get('symbol')}")
-                print(f"   Side: {order.get('side')}")
-                print(f"   Type: {order.get('type')}")
-                print(f"   Status: {order.get('status')}")
-                print(f"   Price: {order.get('price')}")
-                print(f"   Quantity: {order.get('quantity')}")
+                lines.append(f"\n{index}. Order #{order.get('order_id')}:")
+                lines.append(f"   Symbol: {order.get('symbol')}")
+                lines.append(f"   Side: {order.get('side')}")
+                lines.append(f"   Type: {order.get('type')}")
+                lines.append(f"   Status: {order.get('status')}")
+                lines.append(f"   Price: {order.get('price')}")
+                lines.append(f"   Quantity: {order.get('quantity')}")
                 if order.get("amount") is not None:
-                    print(f"   Amount: {order.get('amount')}")
-                print(f"   Executed Quantity: {order.get('executed_quantity')}")
-                print(f"   Total Executed Quantity: {order.get('total_executed_quantity')}")
-                print(f"   Visible Quantity: {order.get('visible_quantity')}")
-                print(f"   Average Executed Price: {order.get('average_executed_price')}")
-                print(f"   Total Fee: {order.get('total_fee')} {order.get('fee_asset')}")
+                    lines.append(f"   Amount: {order.get('amount')}")
+                lines.append(f"   Executed Quantity: {order.get('executed_quantity')}")
+                lines.append(f"   Total Executed Quantity: {order.get('total_executed_quantity')}")
+                lines.append(f"   Visible Quantity: {order.get('visible_quantity')}")
+                lines.append(f"   Average Executed Price: {order.get('average_executed_price')}")
+                lines.append(f"   Total Fee: {order.get('total_fee')} {order.get('fee_asset')}")
                 if order.get("client_order_id") is not None:
-                    print(f"   Client Order ID: {order.get('client_order_id')}")
-                print(f"   Realized PnL: {order.get('realized_pnl')}")
-                print(f"   Created: {order.get('created_time')}")
-                print(f"   Updated: {order.get('updated_time')}")
+                    lines.append(f"   Client Order ID: {order.get('client_order_id')}")
+                lines.append(f"   Realized PnL: {order.get('realized_pnl')}")
+                lines.append(f"   Created: {order.get('created_time')}")
+                lines.append(f"   Updated: {order.get('updated_time')}")
         
-        print("\n" + "=" * 100)
-        print("\n📝 Summary:")
-        print(f"   Wallet Address: {result['walletAddress']}")
-        print(f"   Account ID: {result['accountId']}")
-        print(f"   Number of Orders: {len(result['orders'])}")
+        lines.append("\n" + "=" * 100)
+        lines.append("\n📝 Summary:")
+        lines.append(f"   Wallet Address: {result['walletAddress']}")
+        lines.append(f"   Account ID: {result['accountId']}")
+        lines.append(f"   Number of Orders: {len(result['orders'])}")
         if result["meta"].get("total") is not None:
-            print(f"   Total Orders: {result['meta']['total']}")
-        print(f"   Timestamp: {result.get('timestamp', 'N/A')}")
+            lines.append(f"   Total Orders: {result['meta']['total']}")
+        lines.append(f"   Timestamp: {result.get('timestamp', 'N/A')}")
+        
+        print("\n".join(lines))
         
         sys.exit(0)
     except Exception as error:
@@ -0,0 +1,112 @@
+"""
+Shared HTTP helpers for Privy and Orderly Network API calls
+"""
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Connection pool size per host. Sized for the servers, where MCP tools run on asyncio's
+# default thread pool (up to 32 workers); connections beyond this are opened and then
+# discarded instead of kept alive, so a smaller pool would re-handshake under load
+POOL_SIZE = 32
+
+# Retries for connection failures, rate-limited (HTTP 429) and transient server error responses
+RETRY_ATTEMPTS = 3
+
+# Server errors retried only for idempotent reads, where a repeat cannot duplicate an order
+SERVER_ERROR_STATUSES = frozenset((500, 502, 503, 504))
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+
+class SafeRetry(Retry):
+    """Retry policy that retries 429 for any method but server errors only for idempotent reads"""
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if status_code in SERVER_ERROR_STATUSES and method.upper() not in IDEMPOTENT_METHODS:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def create_session() -> requests.Session:
+    """
+    Create a requests Session with a pooled, keep-alive HTTPS adapter
+    
+    Connection failures and HTTP 429 responses are retried for any method, since
+    in both cases the server did not act on the request. 5xx responses are only
+    retried for GET/HEAD/OPTIONS, so signed POST/DELETE calls are never repeated
+    after the server may have acted on them. Retries wait for the Retry-After
+    header when present, otherwise back off exponentially. If retries run out,
+    the last response is returned so callers report the API error.
+    
+    Returns:
+        Configured requests.Session
+    """
+    retry = SafeRetry(
+        total=RETRY_ATTEMPTS,
+        connect=RETRY_ATTEMPTS,
+        read=0,
+        status=RETRY_ATTEMPTS,
+        status_forcelist=(429, *sorted(SERVER_ERROR_STATUSES)),
+        allowed_methods=None,
+        backoff_factor=0.5,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Shared session so API calls reuse TCP/TLS connections instead of reconnecting per request
+SESSION = create_session()
+
+
+def prewarm(*urls: str, timeout: float = 2) -> None:
+    """
+    Open pooled connections to the given hosts ahead of the first real request
+    
+    Long-running servers call this at startup so the first order request does not
+    pay for the TCP/TLS handshake. Each host gets a single attempt through SESSION's
+    connection pools without its retry/backoff policy, so an unreachable host cannot
+    stall startup. Failures are ignored; the first API call will simply connect as usual.
+    
+    Args:
+        urls: URLs on the hosts to connect to (the response status does not matter)
+        timeout: Per-request timeout in seconds
+    """
+    for url in urls:
+        single_attempt = HTTPAdapter(max_retries=0)
+        single_attempt.poolmanager = SESSION.get_adapter(url).poolmanager
+        try:
+            # Reading the (empty) body returns the connection to the pool
+            single_attempt.send(SESSION.prepare_request(requests.Request("HEAD", url)), timeout=timeout).content
+        except requests.RequestException:
+            pass
+
+
+class RateLimiter:
+    """
+    Thread-safe rate limiter that spaces calls evenly at a fixed rate
+
+    Args:
+        rate_per_second: Maximum number of calls allowed per second
+    """
+
+    def __init__(self, rate_per_second: float):
+        self._interval = 1.0 / rate_per_second
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def wait(self) -> None:
+        """Block until the next call is allowed"""
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_time - now
+            self._next_time = max(now, self._next_time) + self._interval
+        if delay > 0:
+            time.sleep(delay)
@@ -4,11 +4,26 @@ Connects via HTTP and lists available tools using FastMCP
 """
 import asyncio
 import argparse
+import sys
+from typing import List, Sequence, Tuple
+import orjson
 from fastmcp import Client
 
 
-async def main(server_url: str):
-    """Main function to test the MCP server connection"""
+async def main(server_url: str, calls: Sequence[Tuple[str, dict]] = ()) -> bool:
+    """
+    Main function to test the MCP server connection
+    
+    Lists the available tools, then runs each requested tool call over the same
+    connection instead of reconnecting per call.
+    
+    Args:
+        server_url: MCP server URL
+        calls: (tool name, arguments) pairs to invoke after listing tools
+        
+    Returns:
+        True if the connection and every tool call succeeded
+    """
     print(f"Connecting to MCP server at {server_url}...")
     
     try:
@@ -22,10 +37,30 @@ async def main(server_url: str):
                 print(f"Description: {tool.description}")
                 print()
             
+            # A failing tool is reported and the remaining calls still run
+            failed_calls = 0
+            for name, arguments in calls:
+                print(f"Calling {name} with {arguments}...")
+                try:
+                    result = await client.call_tool(name, arguments)
+                    print(f"Result: {result}")
+                except Exception as e:
+                    failed_calls += 1
+                    print(f"Error calling tool {name}: {e}")
+                print()
+            
+            return failed_calls == 0
+    
     except Exception as e:
         print(f"Error connecting to MCP server: {e}")
         print("\nMake sure the MCP server is running:")
         print("  python mcp_server.py")
+        return False
+
+
+def parse_calls(raw_calls: List[List[str]]) -> List[Tuple[str, dict]]:
+    """Parse --call TOOL JSON_ARGS pairs into (tool name, arguments) tuples"""
+    return [(name, orjson.loads(arguments)) for name, arguments in raw_calls or []]
 
 
 if __name__ == "__main__":
@@ -39,6 +74,15 @@ if __name__ == "__main__":
         default="http://localhost:8000/mcp",
         help="MCP server URL (default: http://localhost:8000/mcp)"
     )
+    parser.add_argument(
+        "--call",
+        "-c",
+        nargs=2,
+        action="append",
+        metavar=("TOOL", "JSON_ARGS"),
+        help="Tool to call with JSON arguments, e.g. --call get_holding_tool '{\"wallet_id\": \"...\"}' "
+             "(repeatable; all calls share one connection)"
+    )
     
     args = parser.parse_args()
-    asyncio.run(main(args.server))
+    sys.exit(0 if asyncio.run(main(args.server, parse_calls(args.call))) else 1)
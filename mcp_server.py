@@ -4,6 +4,7 @@ Exposes all Python scripts as MCP tools for AI assistants
 Built with FastMCP for simplicity
 """
 import os
+import asyncio
 from fastmcp import FastMCP
 from dotenv import load_dotenv
 
@@ -13,20 +14,26 @@ from register_orderly_account import register_orderly_account
 from add_orderly_key import add_orderly_key
 from deposit_usdc import deposit_usdc
 from get_holding import get_holding
+from get_account_snapshot import get_account_snapshot
 from create_order import create_order
 from get_orders import get_orders
 from cancel_order import cancel_order
 from withdraw_usdc import withdraw_funds
 from send_transaction import send_transaction
+from http_client import prewarm
+from orderly_constants import ORDERLY_API_URL
+from privy_utils import PRIVY_API_BASE
 
 load_dotenv()
 
 # Initialize FastMCP server
+# Tools are async and run the blocking script functions in worker threads, so one
+# slow Privy/Orderly call does not stall every other request on the event loop
 mcp = FastMCP("Privy Orderly MCP Server")
 
 
 @mcp.tool()
-def create_agentic_wallet_tool(
+async def create_agentic_wallet_tool(
     policy_id: str = None,
     chain_type: str = "ethereum"
 ) -> dict:
@@ -40,11 +47,11 @@ def create_agentic_wallet_tool(
     Returns:
         The created wallet object with ID and address
     """
-    return create_agentic_wallet(policy_id=policy_id, chain_type=chain_type)
+    return await asyncio.to_thread(create_agentic_wallet, policy_id=policy_id, chain_type=chain_type)
 
 
 @mcp.tool()
-def register_orderly_account_tool(
+async def register_orderly_account_tool(
     wallet_id: str,
     chain_id: str = "421614"
 ) -> dict:
@@ -59,14 +66,15 @@ def register_orderly_account_tool(
     Returns:
         Registration result with Orderly account ID
     """
-    return register_orderly_account(
+    return await asyncio.to_thread(
+        register_orderly_account,
         wallet_id=wallet_id,
         chain_id=chain_id
     )
 
 
 @mcp.tool()
-def add_orderly_key_tool(
+async def add_orderly_key_tool(
     wallet_id: str,
     chain_id: int = None
 ) -> dict:
@@ -81,14 +89,15 @@ def add_orderly_key_tool(
     Returns:
         Result with generated Orderly key (saved to .env file)
     """
-    return add_orderly_key(
+    return await asyncio.to_thread(
+        add_orderly_key,
         wallet_id=wallet_id,
         chain_id=chain_id
     )
 
 
 @mcp.tool()
-def deposit_usdc_tool(
+async def deposit_usdc_tool(
     wallet_id: str,
     amount: str,
     chain_id: int = None
@@ -105,7 +114,8 @@ def deposit_usdc_tool(
     Returns:
         Deposit result with transaction hash and details
     """
-    return deposit_usdc(
+    return await asyncio.to_thread(
+        deposit_usdc,
         wallet_id=wallet_id,
         amount=amount,
         chain_id=chain_id
@@ -113,7 +123,7 @@ def deposit_usdc_tool(
 
 
 @mcp.tool()
-def get_holding_tool(
+async def get_holding_tool(
     wallet_id: str
 ) -> dict:
     """
@@ -126,13 +136,38 @@ def get_holding_tool(
     Returns:
         Holdings data with list of tokens and balances
     """
-    return get_holding(
+    return await asyncio.to_thread(
+        get_holding,
         wallet_id=wallet_id
     )
 
 
 @mcp.tool()
-def create_order_tool(
+async def get_account_snapshot_tool(
+    wallet_id: str,
+    include: list = None
+) -> dict:
+    """
+    Gets holdings, open orders and positions from an Orderly account in one call.
+    The sections are fetched concurrently, so this is faster than calling the
+    individual tools one after another.
+    
+    Args:
+        wallet_id: The Privy wallet ID (required)
+        include: Sections to fetch: 'holding', 'orders', 'positions' (optional, default: all)
+    
+    Returns:
+        Snapshot with the data of each requested section
+    """
+    return await asyncio.to_thread(
+        get_account_snapshot,
+        wallet_id=wallet_id,
+        include=include
+    )
+
+
+@mcp.tool()
+async def create_order_tool(
     wallet_id: str,
     symbol: str,
     order_type: str,
@@ -169,7 +204,8 @@ def create_order_tool(
     Returns:
         Order creation result with order ID
     """
-    return create_order(
+    return await asyncio.to_thread(
+        create_order,
         wallet_id=wallet_id,
         symbol=symbol,
         order_type=order_type,
@@ -187,7 +223,7 @@ def create_order_tool(
 
 
 @mcp.tool()
-def get_orders_tool(
+async def get_orders_tool(
     wallet_id: str,
     symbol: str = None,
     side: str = None,
@@ -219,7 +255,8 @@ def get_orders_tool(
     Returns:
         Orders data with list of orders and pagination info
     """
-    return get_orders(
+    return await asyncio.to_thread(
+        get_orders,
         wallet_id=wallet_id,
         symbol=symbol,
         side=side,
@@ -235,7 +272,7 @@ def get_orders_tool(
 
 
 @mcp.tool()
-def cancel_order_tool(
+async def cancel_order_tool(
     wallet_id: str,
     order_id: int,
     symbol: str
@@ -251,7 +288,8 @@ def cancel_order_tool(
     Returns:
         Cancellation result with order status
     """
-    return cancel_order(
+    return await asyncio.to_thread(
+        cancel_order,
         wallet_id=wallet_id,
         order_id=order_id,
         symbol=symbol
@@ -259,7 +297,7 @@ def cancel_order_tool(
 
 
 @mcp.tool()
-def withdraw_funds_tool(
+async def withdraw_funds_tool(
     wallet_id: str,
     amount: str,
     token: str = "USDC",
@@ -278,7 +316,8 @@ def withdraw_funds_tool(
     Returns:
         Withdrawal result with withdrawal nonce and details
     """
-    return withdraw_funds(
+    return await asyncio.to_thread(
+        withdraw_funds,
         wallet_id=wallet_id,
         amount=amount,
         token=token,
@@ -287,7 +326,7 @@ def withdraw_funds_tool(
 
 
 @mcp.tool()
-def send_transaction_tool(
+async def send_transaction_tool(
     wallet_id: str,
     to: str,
     value: str = "1000000000000000",
@@ -305,7 +344,8 @@ def send_transaction_tool(
     Returns:
         Transaction result with transaction hash
     """
-    return send_transaction(
+    return await asyncio.to_thread(
+        send_transaction,
         wallet_id=wallet_id,
         to=to,
         value=value,
@@ -319,4 +359,7 @@ if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
     # Use 0.0.0.0 to listen on all interfaces (required for Heroku)
     host = os.environ.get("HOST", "0.0.0.0")
+    # Connect to Orderly and Privy before serving the first request
+    prewarm(ORDERLY_API_URL, PRIVY_API_BASE)
+    
     mcp.run(transport="http", host=host, port=port, path="/mcp")
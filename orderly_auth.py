@@ -3,10 +3,36 @@ Orderly Network authentication helper module
 Based on Orderly documentation: https://orderly.network/docs/build-on-omnichain/evm-api/api-authentication
 """
 import base64
-import json
-from typing import Optional, Dict, Any
-from nacl.signing import SigningKey
-from nacl.encoding import HexEncoder
+import functools
+import time
+from types import MappingProxyType
+from typing import Optional, Dict, Any, Mapping, Union
+import orjson
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+# Bitcoin base58 alphabet (used for encoding Orderly public keys)
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def b58encode(data: bytes) -> str:
+    """
+    Encode bytes as a base58 string (Bitcoin alphabet)
+    
+    Args:
+        data: Raw bytes to encode (e.g., a 32-byte ed25519 public key)
+        
+    Returns:
+        Base58-encoded string
+    """
+    num = int.from_bytes(data, "big")
+    digits = []
+    while num:
+        num, remainder = divmod(num, 58)
+        digits.append(BASE58_ALPHABET[remainder])
+    
+    # Each leading zero byte is encoded as a single "1"
+    leading_zeros = len(data) - len(data.lstrip(b"\x00"))
+    return "1" * leading_zeros + "".join(reversed(digits))
 
 
 def hex_to_private_key(hex_key: str) -> bytes:
@@ -24,6 +50,23 @@ def hex_to_private_key(hex_key: str) -> bytes:
     return bytes.fromhex(clean_hex)
 
 
+@functools.lru_cache(maxsize=256)
+def hex_to_signing_key(hex_key: str) -> Ed25519PrivateKey:
+    """
+    Convert hex string to an ed25519 signing key
+    
+    Keys are memoized per process, so repeated calls for the same wallet reuse
+    the loaded key instead of parsing the key material again.
+    
+    Args:
+        hex_key: Private key in hex format
+        
+    Returns:
+        Ed25519PrivateKey instance
+    """
+    return Ed25519PrivateKey.from_private_bytes(hex_to_private_key(hex_key))
+
+
 def get_content_type(method: str) -> str:
     """
     Get Content-Type header based on HTTP method
@@ -40,13 +83,27 @@ def get_content_type(method: str) -> str:
     return "application/json"
 
 
+@functools.lru_cache(maxsize=64)
+def _static_headers(method: str, account_id: str, orderly_key: str) -> Mapping[str, str]:
+    """
+    Build the headers that do not change between requests for an account
+    
+    Results are memoized and read-only; callers copy them before adding per-request headers.
+    """
+    return MappingProxyType({
+        "Content-Type": get_content_type(method),
+        "orderly-account-id": account_id,
+        "orderly-key": orderly_key,
+    })
+
+
 def create_authenticated_request(
     method: str,
     path: str,
     body: Optional[Dict[str, Any]],
     account_id: str,
     orderly_key: str,
-    orderly_private_key: bytes
+    orderly_private_key: Union[bytes, Ed25519PrivateKey]
 ) -> Dict[str, Any]:
     """
     Create authenticated request configuration for Orderly API
@@ -57,36 +114,38 @@ def create_authenticated_request(
         body: Request body (None for GET requests)
         account_id: Orderly account ID
         orderly_key: Orderly public key (ed25519:...)
-        orderly_private_key: Orderly private key (32 bytes)
+        orderly_private_key: Orderly private key (32 bytes) or a prebuilt Ed25519PrivateKey
         
     Returns:
-        Request configuration with headers
+        Request configuration with headers and the serialized JSON body (bytes)
+        that must be sent unchanged, since it is what was signed
     """
-    import time
-    
     timestamp = str(int(time.time() * 1000))
-    message = timestamp + method + path + (json.dumps(body) if body else "")
+    
+    # Serialize the body once; the exact bytes signed are the bytes sent
+    body_bytes = orjson.dumps(body) if body else None
+    message_bytes = f"{timestamp}{method}{path}".encode("utf-8") + (body_bytes or b"")
     
     # Sign the message with ed25519 private key
-    signing_key = SigningKey(orderly_private_key)
-    message_bytes = message.encode("utf-8")
-    signature = signing_key.sign(message_bytes).signature
+    if isinstance(orderly_private_key, Ed25519PrivateKey):
+        signing_key = orderly_private_key
+    else:
+        signing_key = Ed25519PrivateKey.from_private_bytes(orderly_private_key)
+    signature = signing_key.sign(message_bytes)
     
     # Encode signature to base64
     signature_base64 = base64.b64encode(signature).decode("utf-8")
     
-    # Create headers
+    # Add the per-request headers to the cached account headers
     headers = {
-        "Content-Type": get_content_type(method),
+        **_static_headers(method, account_id, orderly_key),
         "orderly-timestamp": timestamp,
-        "orderly-account-id": account_id,
-        "orderly-key": orderly_key,
         "orderly-signature": signature_base64,
     }
     
     return {
         "method": method,
         "headers": headers,
-        "body": json.dumps(body) if body else None,
+        "body": body_bytes,
     }
 
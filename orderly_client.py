@@ -0,0 +1,107 @@
+"""
+Shared helpers for authenticated Orderly Network REST calls
+Based on Orderly documentation: https://orderly.network/docs/build-on-omnichain/evm-api/api-authentication
+"""
+import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
+import orjson
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from orderly_auth import create_authenticated_request, hex_to_signing_key
+from privy_utils import get_account_id, get_wallet_address
+from orderly_constants import ORDERLY_API_URL, BROKER_ID
+from orderly_db import get_orderly_keys_or_raise
+from orderly_config import get_privy_config
+from http_client import SESSION
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) timeout in seconds for Orderly requests
+REQUEST_TIMEOUT = (5, 30)
+
+# Credentials needed to sign Orderly requests for a wallet
+OrderlyAccount = namedtuple("OrderlyAccount", "wallet_address account_id orderly_key signing_key")
+
+# Shared worker threads for account lookups, so resolving an account does not start new threads each call
+_RESOLVE_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="orderly-account")
+
+
+def _load_signing_keys(wallet_id: str) -> Tuple[str, Ed25519PrivateKey]:
+    """Load a wallet's Orderly key from the database and decode its signing key"""
+    orderly_key, orderly_private_key_hex = get_orderly_keys_or_raise(wallet_id)
+    return orderly_key, hex_to_signing_key(orderly_private_key_hex)
+
+
+def get_orderly_account(wallet_id: str) -> OrderlyAccount:
+    """
+    Resolve the Orderly account credentials for a Privy wallet
+    
+    The Orderly keys (database, then decoded into a signing key) and the wallet
+    address (Privy API) are resolved concurrently.
+    
+    Args:
+        wallet_id: The Privy wallet ID (required)
+        
+    Returns:
+        OrderlyAccount with wallet address, account ID, Orderly key and signing key
+    """
+    config = get_privy_config()
+    
+    if not config.app_id or not config.app_secret:
+        raise ValueError("Missing PRIVY_APP_ID or PRIVY_APP_SECRET")
+    if not wallet_id:
+        raise ValueError("Wallet ID is required")
+    
+    logger.info("Fetching wallet details...")
+    keys_future = _RESOLVE_EXECUTOR.submit(_load_signing_keys, wallet_id)
+    wallet_address = get_wallet_address(wallet_id, config.app_id, config.app_secret)
+    logger.info("   Wallet Address: %s", wallet_address)
+    account_id = get_account_id(wallet_address, BROKER_ID)
+    orderly_key, signing_key = keys_future.result()
+    
+    return OrderlyAccount(
+        wallet_address=wallet_address,
+        account_id=account_id,
+        orderly_key=orderly_key,
+        signing_key=signing_key,
+    )
+
+
+def orderly_get(path: str, account: OrderlyAccount, action: str) -> dict:
+    """
+    Send an authenticated GET request to Orderly
+    
+    Args:
+        path: API path including any query string (e.g., "/v1/positions")
+        account: Credentials from get_orderly_account
+        action: Short description used in error messages (e.g., "get positions")
+        
+    Returns:
+        Parsed JSON response
+    """
+    request_config = create_authenticated_request(
+        "GET",
+        path,
+        None,
+        account.account_id,
+        account.orderly_key,
+        account.signing_key
+    )
+    
+    response = SESSION.get(
+        f"{ORDERLY_API_URL}{path}",
+        headers={**request_config["headers"], "Accept-Encoding": "gzip"},
+        timeout=REQUEST_TIMEOUT
+    )
+    
+    # Reject error responses before parsing the body
+    if not response.ok:
+        raise Exception(f"Failed to {action} ({response.status_code}): {response.text}")
+    
+    data = orjson.loads(response.content)
+    
+    if not data.get("success"):
+        raise Exception(f"Orderly API returned error: {data}")
+    
+    return data
@@ -0,0 +1,40 @@
+"""
+Privy credentials loaded once from environment variables
+"""
+import os
+import functools
+from dataclasses import dataclass
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+@dataclass(frozen=True)
+class PrivyConfig:
+    """Privy app and authorization credentials (values are None when unset)"""
+    app_id: Optional[str]
+    app_secret: Optional[str]
+    authorization_id: Optional[str]
+    authorization_secret: Optional[str]
+
+    @classmethod
+    def from_env(cls) -> "PrivyConfig":
+        """Read credentials from PRIVY_* environment variables"""
+        return cls(
+            app_id=os.getenv("PRIVY_APP_ID"),
+            app_secret=os.getenv("PRIVY_APP_SECRET"),
+            authorization_id=os.getenv("PRIVY_AUTHORIZATION_ID"),
+            authorization_secret=os.getenv("PRIVY_AUTHORIZATION_SECRET"),
+        )
+
+
+@functools.lru_cache(maxsize=1)
+def get_privy_config() -> PrivyConfig:
+    """
+    Get Privy credentials, read from the environment on first use
+
+    Callers validate the fields they need, so importing this module never fails
+    when some credentials are not configured.
+    """
+    return PrivyConfig.from_env()
@@ -15,3 +15,16 @@ CHAIN_ID = 8453  # Default: Base Mainnet
 VERIFYING_CONTRACT = "0xCcCCccccCCCCcCCCCCCcCcCccCcCCCcCcccccccC"  # For registration and adding keys
 # WITHDRAW_VERIFYING_CONTRACT = "0x6F7a338F2aA472838dEFD3283eB360d4Dff5D203"  # For withdrawals
 WITHDRAW_VERIFYING_CONTRACT = "0x1826B75e2ef249173FC735149AE4B8e9ea10abff"  # For withdrawals
+
+# EIP-712 domain type definition shared by all Orderly typed-data messages
+EIP712_DOMAIN_TYPES = [
+    {"name": "name", "type": "string"},
+    {"name": "version", "type": "string"},
+    {"name": "chainId", "type": "uint256"},
+    {"name": "verifyingContract", "type": "address"},
+]
+
+# Rate Limits
+ORDER_RATE_LIMIT_PER_SECOND = 10  # Orderly allows 10 create/cancel order requests per second
+MAX_CONCURRENT_ORDER_REQUESTS = 5  # Maximum order requests in flight at once
+MAX_BATCH_ORDER_SIZE = 10  # Maximum orders per batch create request
@@ -4,18 +4,50 @@ Uses PostgreSQL for Heroku deployment (DATABASE_URL env var required)
 Private keys are encrypted at rest using Fernet symmetric encryption
 """
 import os
+import atexit
 import base64
-from typing import Optional, Tuple
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from cryptography.fernet import Fernet
+import functools
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
+from cryptography.fernet import Fernet, InvalidToken
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+# Connection pool shared by all threads, created on first use
+_POOL: Optional[ThreadedConnectionPool] = None
+_POOL_LOCK = threading.Lock()
 
+# Default pool size per process. Kept small because every gunicorn worker has its own pool
+# and small Postgres plans allow few connections; callers wait for a free connection, and
+# keys are cached in-process, so a handful of connections covers the threaded callers
+PG_POOL_MAX_DEFAULT = 4
+
+# Counts free pool slots; ThreadedConnectionPool raises PoolError when exhausted instead
+# of waiting, so callers acquire a slot here first and block until one is released
+_POOL_SLOTS: Optional[threading.BoundedSemaphore] = None
+
+# Set once the table has been created in this process
+_SCHEMA_READY = False
+_SCHEMA_LOCK = threading.Lock()
+
+# In-process cache of decrypted keys per wallet_id; entries expire after PRIVY_CACHE_TTL_S
+# seconds (default below). 0 disables the cache and a negative value never expires entries
+KEY_CACHE_SIZE = 256
+KEY_CACHE_TTL_DEFAULT_SECONDS = 300.0
+_KEY_CACHE: "OrderedDict[str, Tuple[float, Tuple[str, str]]]" = OrderedDict()
+_KEY_CACHE_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
 def _get_encryption_key() -> bytes:
     """
     Get or generate encryption key from environment variable
+    Cached so the PBKDF2 derivation runs once per process
     
     Returns:
         Fernet encryption key (32 bytes, base64-encoded)
@@ -46,8 +78,9 @@ def _get_encryption_key() -> bytes:
         return key
 
 
+@functools.lru_cache(maxsize=1)
 def _get_cipher() -> Fernet:
-    """Get Fernet cipher instance for encryption/decryption"""
+    """Get the shared Fernet cipher instance for encryption/decryption"""
     key = _get_encryption_key()
     return Fernet(key)
 
@@ -78,57 +111,160 @@ def _decrypt_private_key(encrypted_key: str) -> str:
     Returns:
         Decrypted private key in hex format
     """
-    cipher = _get_cipher()
+    # Fernet tokens always start with the version byte and timestamp, "gAAAAA" in base64
+    if encrypted_key.startswith("gAAAAA"):
+        try:
+            return _get_cipher().decrypt(encrypted_key.encode()).decode()
+        except InvalidToken:
+            raise ValueError("Failed to decrypt private key (check ENCRYPTION_KEY)")
     
+    # Otherwise it should be plaintext hex (backward compatibility)
     try:
-        # Try to decrypt (assumes it's encrypted)
-        decrypted = cipher.decrypt(encrypted_key.encode())
-        return decrypted.decode()
-    except Exception:
-        # If decryption fails, assume it's plaintext (backward compatibility)
-        # Check if it looks like hex (only contains 0-9, a-f)
-        if all(c in '0123456789abcdef' for c in encrypted_key.lower()):
-            return encrypted_key
-        # If not hex, raise error
+        bytes.fromhex(encrypted_key)
+    except ValueError:
         raise ValueError("Failed to decrypt private key and it doesn't appear to be plaintext hex")
+    return encrypted_key
 
 
-def get_db_connection():
-    """Get a PostgreSQL database connection"""
-    database_url = os.environ.get("DATABASE_URL")
-    
-    if not database_url:
-        raise RuntimeError("DATABASE_URL environment variable is required")
+def _get_pool() -> ThreadedConnectionPool:
+    """Get the PostgreSQL connection pool, creating it on first use"""
+    global _POOL, _POOL_SLOTS
     
-    # Heroku uses postgres:// but psycopg2 requires postgresql://
-    if database_url.startswith("postgres://"):
-        database_url = database_url.replace("postgres://", "postgresql://", 1)
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                database_url = os.environ.get("DATABASE_URL")
+                
+                if not database_url:
+                    raise RuntimeError("DATABASE_URL environment variable is required")
+                
+                # Heroku uses postgres:// but psycopg2 requires postgresql://
+                if database_url.startswith("postgres://"):
+                    database_url = database_url.replace("postgres://", "postgresql://", 1)
+                
+                maxconn = int(os.environ.get("PG_POOL_MAX") or PG_POOL_MAX_DEFAULT)
+                _POOL_SLOTS = threading.BoundedSemaphore(maxconn)
+                _POOL = ThreadedConnectionPool(
+                    minconn=1,
+                    maxconn=maxconn,
+                    dsn=database_url
+                )
+                atexit.register(_POOL.closeall)
+    return _POOL
+
+
+def get_db_connection():
+    """
+    Get a PostgreSQL database connection from the pool, waiting while all are in use
     
-    return psycopg2.connect(database_url)
+    Release it with release_db_connection.
+    """
+    pool = _get_pool()
+    _POOL_SLOTS.acquire()
+    try:
+        return pool.getconn()
+    except BaseException:
+        _POOL_SLOTS.release()
+        raise
 
 
-def init_db():
-    """Initialize the database and create tables if they don't exist"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def release_db_connection(conn) -> None:
+    """Return a connection from get_db_connection to the pool"""
+    try:
+        _get_pool().putconn(conn)
+    finally:
+        _POOL_SLOTS.release()
+
+
+@contextmanager
+def _conn():
+    """Borrow a pooled connection and return it to the pool when done"""
+    if not _SCHEMA_READY:
+        init_db()
     
+    conn = get_db_connection()
     try:
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS privy_orderly_account_private_keys (
-                wallet_id VARCHAR(255) PRIMARY KEY,
-                orderly_key TEXT NOT NULL,
-                orderly_private_key_hex TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        conn.commit()
+        yield conn
     finally:
-        cursor.close()
-        conn.close()
+        # The pool rolls back any transaction left open before reusing the connection
+        release_db_connection(conn)
 
 
-def save_orderly_keys(wallet_id: str, orderly_key: str, orderly_private_key_hex: str) -> None:
+def init_db():
+    """Initialize the database and create tables if they don't exist (runs once per process)"""
+    global _SCHEMA_READY
+    
+    with _SCHEMA_LOCK:
+        if _SCHEMA_READY:
+            return
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS privy_orderly_account_private_keys (
+                    wallet_id VARCHAR(255) PRIMARY KEY,
+                    orderly_key TEXT NOT NULL,
+                    orderly_private_key_hex TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            # Covering index so key lookups by wallet_id are index-only scans (PostgreSQL 11+)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_privy_orderly_keys_wallet_cover
+                ON privy_orderly_account_private_keys (wallet_id)
+                INCLUDE (orderly_key, orderly_private_key_hex)
+            """)
+            conn.commit()
+            _SCHEMA_READY = True
+        finally:
+            cursor.close()
+            release_db_connection(conn)
+
+
+def _key_cache_ttl() -> float:
+    """Seconds decrypted keys stay cached, read when used so values loaded from .env apply"""
+    return float(os.environ.get("PRIVY_CACHE_TTL_S") or KEY_CACHE_TTL_DEFAULT_SECONDS)
+
+
+def _cache_get(wallet_id: str) -> Optional[Tuple[str, str]]:
+    """Get cached decrypted keys for a wallet, or None if missing, expired or caching is disabled"""
+    ttl = _key_cache_ttl()
+    if ttl == 0:
+        return None
+    with _KEY_CACHE_LOCK:
+        entry = _KEY_CACHE.get(wallet_id)
+        if entry is None:
+            return None
+        stored_at, keys = entry
+        if ttl > 0 and time.monotonic() - stored_at > ttl:
+            del _KEY_CACHE[wallet_id]
+            return None
+        _KEY_CACHE.move_to_end(wallet_id)
+        return keys
+
+
+def _cache_put(wallet_id: str, keys: Tuple[str, str]) -> None:
+    """Cache decrypted keys for a wallet, evicting the least recently used entry when full"""
+    if _key_cache_ttl() == 0:
+        return
+    with _KEY_CACHE_LOCK:
+        _KEY_CACHE[wallet_id] = (time.monotonic(), keys)
+        _KEY_CACHE.move_to_end(wallet_id)
+        if len(_KEY_CACHE) > KEY_CACHE_SIZE:
+            _KEY_CACHE.popitem(last=False)
+
+
+def _cache_invalidate(*wallet_ids: str) -> None:
+    """Drop cached keys for wallets whose stored keys changed"""
+    with _KEY_CACHE_LOCK:
+        for wallet_id in wallet_ids:
+            _KEY_CACHE.pop(wallet_id, None)
+
+
+def save_orderly_keys(wallet_id: str, orderly_key: str, orderly_private_key: Union[str, bytes]) -> None:
     """
     Save or update Orderly keys for a wallet
     Private key is encrypted before storing in the database
@@ -136,30 +272,86 @@ def save_orderly_keys(wallet_id: str, orderly_key: str, orderly_private_key_hex:
     Args:
         wallet_id: The Privy wallet ID
         orderly_key: The Orderly public key (ed25519:...)
-        orderly_private_key_hex: The Orderly private key in hex format (will be encrypted)
+        orderly_private_key: The Orderly private key as raw bytes or hex string (will be encrypted)
     """
-    init_db()  # Ensure table exists
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    # Keys are stored in hex format
+    if isinstance(orderly_private_key, bytes):
+        orderly_private_key = orderly_private_key.hex()
     
-    try:
-        # Encrypt the private key before storing
-        encrypted_private_key = _encrypt_private_key(orderly_private_key_hex)
+    with _conn() as conn:
+        cursor = conn.cursor()
         
-        cursor.execute("""
-            INSERT INTO privy_orderly_account_private_keys 
-            (wallet_id, orderly_key, orderly_private_key_hex, updated_at)
-            VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
-            ON CONFLICT (wallet_id) 
-            DO UPDATE SET 
-                orderly_key = EXCLUDED.orderly_key,
-                orderly_private_key_hex = EXCLUDED.orderly_private_key_hex,
-                updated_at = CURRENT_TIMESTAMP
-        """, (wallet_id, orderly_key, encrypted_private_key))
-        conn.commit()
-    finally:
-        cursor.close()
-        conn.close()
+        try:
+            # Encrypt the private key before storing
+            encrypted_private_key = _encrypt_private_key(orderly_private_key)
+            
+            cursor.execute(
+                """
+                INSERT INTO privy_orderly_account_private_keys 
+                (wallet_id, orderly_key, orderly_private_key_hex)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (wallet_id) 
+                DO UPDATE SET 
+                    orderly_key = EXCLUDED.orderly_key,
+                    orderly_private_key_hex = EXCLUDED.orderly_private_key_hex,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                (wallet_id, orderly_key, encrypted_private_key)
+            )
+            conn.commit()
+        finally:
+            cursor.close()
+    
+    _cache_invalidate(wallet_id)
+
+
+def save_orderly_keys_many(rows: List[Tuple[str, str, Union[str, bytes]]]) -> None:
+    """
+    Save or update Orderly keys for many wallets in a single round trip
+    Private keys are encrypted before storing in the database
+    
+    Args:
+        rows: List of (wallet_id, orderly_key, orderly_private_key) tuples; private keys
+              may be raw bytes or hex strings. If a wallet_id repeats, the last row wins.
+    """
+    if not rows:
+        return
+    
+    # One row per wallet_id, since an upsert cannot touch the same row twice
+    latest = {wallet_id: (orderly_key, private_key) for wallet_id, orderly_key, private_key in rows}
+    values = [
+        (
+            wallet_id,
+            orderly_key,
+            _encrypt_private_key(private_key.hex() if isinstance(private_key, bytes) else private_key)
+        )
+        for wallet_id, (orderly_key, private_key) in latest.items()
+    ]
+    
+    with _conn() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            execute_values(
+                cursor,
+                """
+                INSERT INTO privy_orderly_account_private_keys 
+                (wallet_id, orderly_key, orderly_private_key_hex)
+                VALUES %s
+                ON CONFLICT (wallet_id) 
+                DO UPDATE SET 
+                    orderly_key = EXCLUDED.orderly_key,
+                    orderly_private_key_hex = EXCLUDED.orderly_private_key_hex,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                values,
+                page_size=1000
+            )
+            conn.commit()
+        finally:
+            cursor.close()
+    
+    _cache_invalidate(*latest)
 
 
 def get_orderly_keys(wallet_id: str) -> Optional[Tuple[str, str]]:
@@ -174,24 +366,69 @@ def get_orderly_keys(wallet_id: str) -> Optional[Tuple[str, str]]:
         Tuple of (orderly_key, orderly_private_key_hex) or None if not found
         The private key is decrypted before returning
     """
-    init_db()  # Ensure table exists
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    cached = _cache_get(wallet_id)
+    if cached is not None:
+        return cached
     
-    try:
-        cursor.execute(
-            "SELECT orderly_key, orderly_private_key_hex FROM privy_orderly_account_private_keys WHERE wallet_id = %s",
-            (wallet_id,)
-        )
-        row = cursor.fetchone()
-        if row:
-            # Decrypt the private key
-            decrypted_private_key = _decrypt_private_key(row["orderly_private_key_hex"])
-            return (row["orderly_key"], decrypted_private_key)
-        return None
-    finally:
-        cursor.close()
-        conn.close()
+    with _conn() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        
+        try:
+            cursor.execute(
+                "SELECT orderly_key, orderly_private_key_hex FROM privy_orderly_account_private_keys WHERE wallet_id = %s",
+                (wallet_id,)
+            )
+            row = cursor.fetchone()
+            if row:
+                # Decrypt the private key
+                decrypted_private_key = _decrypt_private_key(row["orderly_private_key_hex"])
+                keys = (row["orderly_key"], decrypted_private_key)
+                _cache_put(wallet_id, keys)
+                return keys
+            return None
+        finally:
+            cursor.close()
+
+
+def get_orderly_keys_many(wallet_ids: List[str]) -> Dict[str, Tuple[str, str]]:
+    """
+    Get Orderly keys for many wallets in a single query
+    Private keys are decrypted after retrieving from the database
+    
+    Args:
+        wallet_ids: List of Privy wallet IDs
+        
+    Returns:
+        Dict mapping wallet_id to (orderly_key, orderly_private_key_hex)
+        Wallets without stored keys are omitted
+    """
+    result = {}
+    missing = []
+    for wallet_id in wallet_ids:
+        cached = _cache_get(wallet_id)
+        if cached is not None:
+            result[wallet_id] = cached
+        else:
+            missing.append(wallet_id)
+    
+    if not missing:
+        return result
+    
+    with _conn() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute(
+                "SELECT wallet_id, orderly_key, orderly_private_key_hex FROM privy_orderly_account_private_keys WHERE wallet_id = ANY(%s)",
+                (missing,)
+            )
+            for wallet_id, orderly_key, encrypted_private_key in cursor.fetchall():
+                keys = (orderly_key, _decrypt_private_key(encrypted_private_key))
+                _cache_put(wallet_id, keys)
+                result[wallet_id] = keys
+            return result
+        finally:
+            cursor.close()
 
 
 def get_orderly_keys_or_raise(wallet_id: str) -> Tuple[str, str]:
@@ -226,34 +463,63 @@ def delete_orderly_keys(wallet_id: str) -> bool:
     Returns:
         True if deleted, False if not found
     """
-    init_db()  # Ensure table exists
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute("DELETE FROM privy_orderly_account_private_keys WHERE wallet_id = %s", (wallet_id,))
-        conn.commit()
-        return cursor.rowcount > 0
-    finally:
-        cursor.close()
-        conn.close()
+    with _conn() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("DELETE FROM privy_orderly_account_private_keys WHERE wallet_id = %s", (wallet_id,))
+            conn.commit()
+            return cursor.rowcount > 0
+        finally:
+            cursor.close()
+            _cache_invalidate(wallet_id)
 
 
-def list_all_wallets() -> list:
+def delete_orderly_keys_many(wallet_ids: List[str]) -> int:
     """
-    List all wallet IDs that have Orderly keys stored
+    Delete Orderly keys for many wallets in a single statement
     
+    Args:
+        wallet_ids: List of Privy wallet IDs
+        
     Returns:
-        List of wallet IDs
+        Number of wallets whose keys were deleted
     """
-    init_db()  # Ensure table exists
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    if not wallet_ids:
+        return 0
     
-    try:
-        cursor.execute("SELECT wallet_id, created_at, updated_at FROM privy_orderly_account_private_keys ORDER BY created_at DESC")
-        return [dict(row) for row in cursor.fetchall()]
-    finally:
-        cursor.close()
-        conn.close()
+    with _conn() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute(
+                "DELETE FROM privy_orderly_account_private_keys WHERE wallet_id = ANY(%s) RETURNING wallet_id",
+                (list(wallet_ids),)
+            )
+            deleted = [row[0] for row in cursor.fetchall()]
+            conn.commit()
+            return len(deleted)
+        finally:
+            cursor.close()
+            _cache_invalidate(*wallet_ids)
 
+
+def list_all_wallets() -> Iterator[dict]:
+    """
+    List all wallet IDs that have Orderly keys stored
+    
+    Rows are streamed from a server-side cursor, so the pooled connection is held
+    until the iterator is exhausted or closed. Wrap in list() to materialize.
+    
+    Returns:
+        Iterator of rows (dicts with wallet_id, created_at, updated_at)
+    """
+    with _conn() as conn:
+        cursor = conn.cursor(name="list_all_wallets_cursor", cursor_factory=RealDictCursor)
+        cursor.itersize = 1000
+        
+        try:
+            cursor.execute("SELECT wallet_id, created_at, updated_at FROM privy_orderly_account_private_keys ORDER BY created_at DESC")
+            yield from cursor
+        finally:
+            cursor.close()
@@ -1,48 +1,249 @@
 """
 Shared utility functions for Privy and Orderly Network integration
 """
-from typing import Any, Dict
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Tuple
 
+import os
 import base64
-import requests
-from eth_abi import encode
+import functools
+import threading
+import time
+from collections import OrderedDict
+import orjson
 from eth_utils import keccak, to_hex
-from privy_eth_account import create_eth_account, PrivyHTTPClient
+from http_client import SESSION
+from orderly_constants import BROKER_ID
 
 # Privy API base URL (used for low-level wallet operations)
 PRIVY_API_BASE = "https://auth.privy.io/api/v1"
 
+# keccak256 of the default broker ID, used for every account ID derivation
+BROKER_ID_HASH = keccak(BROKER_ID.encode())
 
-def get_account_id(address: str, broker_id: str) -> str:
-    """Generate Orderly account ID"""
-    broker_id_hash = keccak(broker_id.encode())
-    encoded = encode(["address", "bytes32"], [address, broker_id_hash])
-    return to_hex(keccak(encoded))
+# Guards writes to the optional wallet address cache file (PRIVY_WALLET_CACHE_FILE)
+_WALLET_CACHE_LOCK = threading.Lock()
 
+# In-process memo of wallet addresses with the time they were fetched, keyed by (wallet_id, app_id)
+WALLET_ADDRESS_CACHE_SIZE = 1024
+_WALLET_ADDRESSES: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
 
-def get_wallet_address(wallet_id: str, app_id: str, app_secret: str) -> str:
-    """Get wallet address from Privy"""
-    auth_string = f"{app_id}:{app_secret}"
-    encoded_auth = base64.b64encode(auth_string.encode()).decode()
-    headers = {
+# Seconds a cached wallet address (memo or PRIVY_WALLET_CACHE_FILE) is trusted before it is
+# fetched again, so an entry for a deleted or recreated wallet does not live forever
+WALLET_ADDRESS_TTL_DEFAULT_SECONDS = 86400.0
+_WALLET_ADDRESSES_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=4)
+def get_privy_headers(app_id: str, app_secret: str) -> Mapping[str, str]:
+    """
+    Build the Basic-auth headers for Privy REST API calls
+    Results are memoized per credential pair and returned read-only so the cached
+    headers cannot be changed by a caller
+    """
+    encoded_auth = base64.b64encode(f"{app_id}:{app_secret}".encode()).decode()
+    return MappingProxyType({
         "Authorization": f"Basic {encoded_auth}",
         "privy-app-id": app_id,
         "Content-Type": "application/json",
-    }
-    response = requests.get(f"{PRIVY_API_BASE}/wallets/{wallet_id}", headers=headers)
+    })
+
+
+@functools.lru_cache(maxsize=1024)
+def get_account_id(address: str, broker_id: str) -> str:
+    """
+    Generate Orderly account ID: keccak256(abi.encode(address, keccak256(broker_id)))
+    Both values are fixed-size words, so the address is left-padded to 32 bytes directly
+    """
+    if len(address) != 42 or not address.startswith("0x"):
+        raise ValueError(f"Invalid wallet address: {address}")
+    broker_id_hash = BROKER_ID_HASH if broker_id == BROKER_ID else keccak(broker_id.encode())
+    address_word = bytes.fromhex(address[2:]).rjust(32, b"\x00")
+    return to_hex(keccak(address_word + broker_id_hash))
+
+
+def _wallet_address_ttl() -> float:
+    """Seconds a cached wallet address stays valid (PRIVY_WALLET_CACHE_TTL_S, read when used)"""
+    return float(os.environ.get("PRIVY_WALLET_CACHE_TTL_S") or WALLET_ADDRESS_TTL_DEFAULT_SECONDS)
+
+
+def _is_fresh(stored_at: float) -> bool:
+    """Whether a wallet address cached at stored_at (epoch seconds) is still within the TTL"""
+    return time.time() - stored_at < _wallet_address_ttl()
+
+
+@functools.lru_cache(maxsize=1)
+def _load_wallet_cache() -> Dict[str, list]:
+    """Load the persisted wallet address cache of [address, stored_at] entries (empty when disabled or unreadable)"""
+    cache_path = os.getenv("PRIVY_WALLET_CACHE_FILE")
+    if not cache_path:
+        return {}
+    try:
+        with open(cache_path, "rb") as cache_file:
+            return orjson.loads(cache_file.read())
+    except (OSError, orjson.JSONDecodeError):
+        return {}
+
+
+def _write_wallet_cache(cache_path: str, cache: Dict[str, list]) -> None:
+    """Write the persisted wallet address cache atomically (caller holds _WALLET_CACHE_LOCK)"""
+    temp_path = f"{cache_path}.tmp"
+    try:
+        with open(temp_path, "wb") as cache_file:
+            cache_file.write(orjson.dumps(cache))
+        os.replace(temp_path, cache_path)
+    except OSError:
+        # The cache is an optimization; failing to persist it is not an error
+        pass
+
+
+def _save_wallet_address(cache_key: str, wallet_address: str, stored_at: float) -> None:
+    """Add a wallet address to the persisted cache, dropping entries that have expired"""
+    cache_path = os.getenv("PRIVY_WALLET_CACHE_FILE")
+    if not cache_path:
+        return
+    with _WALLET_CACHE_LOCK:
+        cache = _load_wallet_cache()
+        for key in [key for key, entry in cache.items() if not isinstance(entry, list) or not _is_fresh(entry[1])]:
+            del cache[key]
+        cache[cache_key] = [wallet_address, stored_at]
+        _write_wallet_cache(cache_path, cache)
+
+
+def _remember_wallet_address(memo_key: Tuple[str, str], wallet_address: str, stored_at: float) -> None:
+    """Memoize a wallet address, evicting the least recently used entry when full"""
+    with _WALLET_ADDRESSES_LOCK:
+        _WALLET_ADDRESSES[memo_key] = (stored_at, wallet_address)
+        _WALLET_ADDRESSES.move_to_end(memo_key)
+        if len(_WALLET_ADDRESSES) > WALLET_ADDRESS_CACHE_SIZE:
+            _WALLET_ADDRESSES.popitem(last=False)
+
+
+def get_wallet_address(wallet_id: str, app_id: str, app_secret: str) -> str:
+    """
+    Get wallet address from Privy
+    Results are memoized per process, and also persisted to PRIVY_WALLET_CACHE_FILE
+    when that is set; either copy is fetched again once it is older than
+    PRIVY_WALLET_CACHE_TTL_S (default one day)
+    """
+    memo_key = (wallet_id, app_id)
+    with _WALLET_ADDRESSES_LOCK:
+        entry = _WALLET_ADDRESSES.get(memo_key)
+        if entry is not None:
+            if _is_fresh(entry[0]):
+                _WALLET_ADDRESSES.move_to_end(memo_key)
+                return entry[1]
+            del _WALLET_ADDRESSES[memo_key]
+    
+    cache_key = f"{app_id}:{wallet_id}"
+    cached = _load_wallet_cache().get(cache_key)
+    # Entries written before expiry was tracked are plain strings; treat them as expired
+    if isinstance(cached, list) and _is_fresh(cached[1]):
+        _remember_wallet_address(memo_key, cached[0], cached[1])
+        return cached[0]
+    
+    response = SESSION.get(f"{PRIVY_API_BASE}/wallets/{wallet_id}", headers=get_privy_headers(app_id, app_secret))
     if not response.ok:
-        raise Exception(f"Failed to get wallet: {response.text}")
-    wallet: Dict[str, Any] = response.json()
-    wallet_address = (
-        wallet.get("address")
-        or (wallet.get("addresses", [{}])[0].get("address") if wallet.get("addresses") else None)
-        or (wallet.get("addresses", [None])[0] if wallet.get("addresses") else None)
-    )
+        raise Exception(f"Failed to get wallet ({response.status_code}): {response.text}")
+    wallet: Dict[str, Any] = orjson.loads(response.content)
+    wallet_address = wallet.get("address")
+    if not wallet_address:
+        # Fall back to the first entry of "addresses", which may be an object or a plain string
+        addresses = wallet.get("addresses")
+        first_address = addresses[0] if addresses else None
+        wallet_address = first_address.get("address") if isinstance(first_address, dict) else first_address
     if not wallet_address:
         raise Exception("Could not determine wallet address from wallet object")
+    stored_at = time.time()
+    _save_wallet_address(cache_key, wallet_address, stored_at)
+    _remember_wallet_address(memo_key, wallet_address, stored_at)
     return wallet_address
 
 
+def invalidate_wallet_address(wallet_id: str) -> None:
+    """
+    Forget the cached address of a wallet, e.g. after the wallet was deleted or recreated
+    
+    Only this wallet's entries are dropped, from both the in-process memo and
+    PRIVY_WALLET_CACHE_FILE; other wallets stay cached.
+    
+    Args:
+        wallet_id: The Privy wallet ID
+    """
+    with _WALLET_ADDRESSES_LOCK:
+        for memo_key in [memo_key for memo_key in _WALLET_ADDRESSES if memo_key[0] == wallet_id]:
+            del _WALLET_ADDRESSES[memo_key]
+    cache_path = os.getenv("PRIVY_WALLET_CACHE_FILE")
+    if not cache_path:
+        return
+    with _WALLET_CACHE_LOCK:
+        cache = _load_wallet_cache()
+        stale_keys = [key for key in cache if key.endswith(f":{wallet_id}")]
+        if not stale_keys:
+            return
+        for key in stale_keys:
+            del cache[key]
+        _write_wallet_cache(cache_path, cache)
+
+
+@functools.lru_cache(maxsize=16)
+def get_privy_client(app_id: str, app_secret: str, authorization_secret: str = None):
+    """
+    Get a PrivyAPI client configured with the authorization key
+    
+    Clients are memoized per credential set so repeated transactions reuse the
+    same client and its HTTP connections instead of rebuilding it on every call.
+    
+    Args:
+        app_id: Privy App ID
+        app_secret: Privy App Secret
+        authorization_secret: Privy authorization private key (optional)
+        
+    Returns:
+        Configured PrivyAPI client
+    """
+    # Imported here so modules that only need wallet lookups do not load the Privy SDK
+    from privy import PrivyAPI
+    
+    client = PrivyAPI(app_id=app_id, app_secret=app_secret)
+    if authorization_secret:
+        client.update_authorization_key(authorization_secret)
+    return client
+
+
+@functools.lru_cache(maxsize=16)
+def _get_orderly_domain(chain_id: int, verifying_contract: str) -> Mapping[str, Any]:
+    """Build the Orderly EIP-712 domain once per (chain_id, verifying_contract), read-only"""
+    return MappingProxyType({
+        "name": "Orderly",
+        "version": "1",
+        "chainId": f"0x{chain_id:x}",
+        "verifyingContract": verifying_contract,
+    })
+
+
+def get_orderly_domain(chain_id: int, verifying_contract: str) -> Dict[str, Any]:
+    """
+    Build the Orderly EIP-712 domain for a chain
+    Returns a fresh dict copied from the memoized read-only domain, so it can be placed in
+    typed data and handed to JSON encoders and signers without affecting later calls
+    """
+    return dict(_get_orderly_domain(chain_id, verifying_contract))
+
+
+@functools.lru_cache(maxsize=16)
+def _get_privy_http_client(app_id: str, app_secret: str, authorization_secret: str):
+    """Get a PrivyHTTPClient for signing, memoized per credential set so its connections are reused"""
+    # Imported here so modules that only need wallet lookups do not load eth_account
+    from privy_eth_account import PrivyHTTPClient
+    
+    return PrivyHTTPClient(
+        app_id=app_id,
+        app_secret=app_secret,
+        authorization_key=authorization_secret,
+    )
+
+
 def sign_typed_data(
     wallet_id: str,
     typed_data: dict,
@@ -58,12 +259,11 @@ def sign_typed_data(
     helper library (see the Privy Ethereum web3 integrations docs:
     [Privy Ethereum web3 integrations](https://docs.privy.io/wallets/using-wallets/ethereum/web3-integrations#python)).
     """
-    # Initialize Privy HTTP client with server-side credentials and authorization key
-    client = PrivyHTTPClient(
-        app_id=app_id,
-        app_secret=app_secret,
-        authorization_key=authorization_secret,
-    )
+    # Imported here so modules that only need wallet lookups do not load eth_account
+    from privy_eth_account import create_eth_account
+
+    # Reuse the Privy HTTP client for these server-side credentials and authorization key
+    client = _get_privy_http_client(app_id, app_secret, authorization_secret)
 
     # Fetch the wallet address for this wallet_id
     wallet_address = get_wallet_address(wallet_id, app_id, app_secret)
@@ -1,17 +1,45 @@
 """
 Registers an account on Orderly Network using a Privy agentic wallet
 """
-import os
 import sys
 import argparse
 import time
+from concurrent.futures import ThreadPoolExecutor
+import orjson
 from dotenv import load_dotenv
-import requests
-from privy_utils import get_wallet_address, sign_typed_data
-from orderly_constants import ORDERLY_API_URL, BROKER_ID, VERIFYING_CONTRACT
+from privy_utils import get_wallet_address, get_orderly_domain, sign_typed_data
+from orderly_constants import ORDERLY_API_URL, BROKER_ID, VERIFYING_CONTRACT, EIP712_DOMAIN_TYPES
+from orderly_config import get_privy_config
+from http_client import SESSION
 
 load_dotenv()
 
+# EIP-712 types for Orderly account registration
+REGISTRATION_TYPES = {
+    "EIP712Domain": EIP712_DOMAIN_TYPES,
+    "Registration": [
+        {"name": "brokerId", "type": "string"},
+        {"name": "chainId", "type": "uint256"},
+        {"name": "timestamp", "type": "uint64"},
+        {"name": "registrationNonce", "type": "uint256"},
+    ],
+}
+
+
+def get_registration_nonce() -> int:
+    """
+    Get a registration nonce from Orderly
+    
+    Returns:
+        Registration nonce
+    """
+    nonce_response = SESSION.get(f"{ORDERLY_API_URL}/v1/registration_nonce")
+    if not nonce_response.ok:
+        raise Exception(f"Failed to get registration nonce ({nonce_response.status_code}): {nonce_response.text}")
+    
+    nonce_data = orjson.loads(nonce_response.content)
+    return nonce_data["data"]["registration_nonce"]
+
 
 def register_orderly_account(wallet_id: str, chain_id: str = "421614") -> dict:
     """
@@ -25,10 +53,11 @@ def register_orderly_account(wallet_id: str, chain_id: str = "421614") -> dict:
         The registration response
     """
     # Validate environment variables
-    app_id = os.getenv("PRIVY_APP_ID")
-    app_secret = os.getenv("PRIVY_APP_SECRET")
-    authorization_id = os.getenv("PRIVY_AUTHORIZATION_ID")
-    authorization_secret = os.getenv("PRIVY_AUTHORIZATION_SECRET")
+    config = get_privy_config()
+    app_id = config.app_id
+    app_secret = config.app_secret
+    authorization_id = config.authorization_id
+    authorization_secret = config.authorization_secret
     
     if not app_id or not app_secret:
         raise ValueError(
@@ -48,10 +77,16 @@ def register_orderly_account(wallet_id: str, chain_id: str = "421614") -> dict:
         raise ValueError("Wallet ID is required. Use --wallet-id <wallet_id>")
     
     try:
-        # Get wallet address
-        print("Fetching wallet details...")
-        wallet_address = get_wallet_address(wallet_id, app_id, app_secret)
-        print(f"   Wallet Address: {wallet_address}")
+        # The registration nonce does not depend on the wallet, so request it while the address is looked up
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            nonce_future = executor.submit(get_registration_nonce)
+            
+            # Get wallet address
+            print("Fetching wallet details...")
+            wallet_address = get_wallet_address(wallet_id, app_id, app_secret)
+            print(f"   Wallet Address: {wallet_address}")
+            
+            registration_nonce = nonce_future.result()
         
         chain_id_number = int(chain_id)
         chain_id_hex = f"0x{chain_id_number:x}"
@@ -63,14 +98,8 @@ def register_orderly_account(wallet_id: str, chain_id: str = "421614") -> dict:
         print(f"   Broker ID: {BROKER_ID}")
         print(f"   Orderly API: {ORDERLY_API_URL}")
         
-        # Step 1: Get registration nonce from Orderly
-        print("\nStep 1: Getting registration nonce...")
-        nonce_response = requests.get(f"{ORDERLY_API_URL}/v1/registration_nonce")
-        if not nonce_response.ok:
-            raise Exception(f"Failed to get registration nonce ({nonce_response.status_code}): {nonce_response.text}")
-        
-        nonce_data = nonce_response.json()
-        registration_nonce = nonce_data["data"]["registration_nonce"]
+        # Step 1: Registration nonce from Orderly (fetched above)
+        print("\nStep 1: Got registration nonce")
         print(f"   Registration Nonce: {registration_nonce}")
         
         # Step 2: Prepare EIP-712 typed data for Orderly registration
@@ -82,30 +111,12 @@ def register_orderly_account(wallet_id: str, chain_id: str = "421614") -> dict:
             "registrationNonce": registration_nonce,
         }
         
-        # EIP-712 types structure
+        # EIP-712 typed data; the domain and types are shared constants
         typed_data = {
-            "domain": {
-                "name": "Orderly",
-                "version": "1",
-                "chainId": chain_id_hex,
-                "verifyingContract": VERIFYING_CONTRACT,
-            },
+            "domain": get_orderly_domain(chain_id_number, VERIFYING_CONTRACT),
             "message": register_message,
             "primary_type": "Registration",
-            "types": {
-                "EIP712Domain": [
-                    {"name": "name", "type": "string"},
-                    {"name": "version", "type": "string"},
-                    {"name": "chainId", "type": "uint256"},
-                    {"name": "verifyingContract", "type": "address"},
-                ],
-                "Registration": [
-                    {"name": "brokerId", "type": "string"},
-                    {"name": "chainId", "type": "uint256"},
-                    {"name": "timestamp", "type": "uint64"},
-                    {"name": "registrationNonce", "type": "uint256"},
-                ],
-            },
+            "types": REGISTRATION_TYPES,
         }
         
         print("\nStep 2: Signing EIP-712 message...")
@@ -125,16 +136,16 @@ def register_orderly_account(wallet_id: str, chain_id: str = "421614") -> dict:
         
         print(f"Registration payload: {registration_payload}")
         
-        response = requests.post(
+        response = SESSION.post(
             f"{ORDERLY_API_URL}/v1/register_account",
             headers={"Content-Type": "application/json"},
-            json=registration_payload
+            data=orjson.dumps(registration_payload)
         )
         
         if not response.ok:
             raise Exception(f"Orderly API error ({response.status_code}): {response.text}")
         
-        result = response.json()
+        result = orjson.loads(response.content)
         
         if not result.get("success"):
             raise Exception(f"Orderly registration failed: {result.get('message', 'Unknown error')}")
@@ -5,7 +5,7 @@ import os
 import sys
 import argparse
 from dotenv import load_dotenv
-from privy import PrivyAPI
+from privy_utils import get_privy_client
 
 load_dotenv()
 
@@ -59,12 +59,8 @@ def send_transaction(wallet_id: str, to: str, value: str = "1000000000000000", c
     print(f"   Chain ID: {chain_id} ({get_chain_name(chain_id)}) = {chain_id_hex}")
     
     try:
-        # Initialize Privy client
-        client = PrivyAPI(
-            app_id=app_id,
-            app_secret=app_secret
-        )
-        client.update_authorization_key(authorization_secret)
+        # Get cached Privy client
+        client = get_privy_client(app_id, app_secret, authorization_secret)
         
         # Send transaction using PrivyAPI
         result = client.wallets.rpc(
@@ -5,9 +5,7 @@ import os
 import sys
 import argparse
 from dotenv import load_dotenv
-from web3 import Web3
-from privy import PrivyAPI
-from privy_utils import get_wallet_address
+from privy_utils import get_wallet_address, get_privy_client
 
 load_dotenv()
 
@@ -141,12 +139,11 @@ def send_usdc(wallet_id: str, to: str, amount: str, chain_id: str = "11155111")
     chain_id_int = int(chain_id)
     chain_id_hex = f"0x{chain_id_int:x}"
     
-    # Initialize Privy client
-    client = PrivyAPI(
-        app_id=app_id,
-        app_secret=app_secret
-    )
-    client.update_authorization_key(authorization_secret)
+    # Imported here so the CLI starts without loading web3
+    from web3 import Web3
+    
+    # Get cached Privy client
+    client = get_privy_client(app_id, app_secret, authorization_secret)
     
     try:
         # Get wallet address using the proven helper function
@@ -12,19 +12,27 @@ from add_orderly_key import add_orderly_key
 from deposit_usdc import deposit_usdc
 from get_holding import get_holding
 from get_positions import get_positions
-from create_order import create_order
+from get_account_snapshot import get_account_snapshot
+from create_order import create_order, create_orders
 from get_orders import get_orders
 from cancel_order import cancel_order
 from cancel_all_orders import cancel_all_orders
 from close_all_positions import close_all_positions
 from settle_pnl import settle_pnl
 from withdraw_usdc import withdraw_funds
+from http_client import prewarm
+from orderly_constants import ORDERLY_API_URL
+from privy_utils import PRIVY_API_BASE
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
 
+# Connect to Orderly and Privy before serving the first request; runs on import so
+# gunicorn workers (which never execute the __main__ block) are prewarmed too
+prewarm(ORDERLY_API_URL, PRIVY_API_BASE)
+
 # Authentication
 def require_api_key(f):
     """
@@ -203,6 +211,20 @@ def api_get_positions():
         return jsonify({"success": False, "error": str(error)}), 500
 
 
+@app.route("/api/get-account-snapshot", methods=["POST"])
+@require_api_key
+def api_get_account_snapshot():
+    try:
+        data = request.json or {}
+        result = get_account_snapshot(
+            wallet_id=data.get("walletId"),
+            include=data.get("include")
+        )
+        return jsonify({"success": True, "data": result})
+    except Exception as error:
+        return jsonify({"success": False, "error": str(error)}), 500
+
+
 @app.route("/api/create-order", methods=["POST"])
 @require_api_key
 def api_create_order():
@@ -228,6 +250,20 @@ def api_create_order():
         return jsonify({"success": False, "error": str(error)}), 500
 
 
+@app.route("/api/create-orders", methods=["POST"])
+@require_api_key
+def api_create_orders():
+    try:
+        data = request.json or {}
+        result = create_orders(
+            wallet_id=data.get("walletId"),
+            orders=data.get("orders")
+        )
+        return jsonify({"success": True, "data": result})
+    except Exception as error:
+        return jsonify({"success": False, "error": str(error)}), 500
+
+
 @app.route("/api/get-orders", methods=["POST"])
 @require_api_key
 def api_get_orders():
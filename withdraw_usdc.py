@@ -2,20 +2,35 @@
 Withdraw funds from Orderly account using Privy agentic wallet
 Based on Orderly documentation: https://orderly.network/docs/build-on-omnichain/user-flows/withdrawal-deposit
 """
-import os
 import sys
 import argparse
 import time
+import orjson
 from dotenv import load_dotenv
-from web3 import Web3
-from orderly_auth import create_authenticated_request, hex_to_private_key
-import requests
-from privy_utils import get_account_id, get_wallet_address, sign_typed_data, PRIVY_API_BASE
-from orderly_constants import ORDERLY_API_URL, CHAIN_ID, BROKER_ID, WITHDRAW_VERIFYING_CONTRACT
-from orderly_db import get_orderly_keys_or_raise
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from orderly_auth import create_authenticated_request
+from privy_utils import get_orderly_domain, sign_typed_data
+from orderly_constants import ORDERLY_API_URL, CHAIN_ID, BROKER_ID, WITHDRAW_VERIFYING_CONTRACT, EIP712_DOMAIN_TYPES
+from orderly_client import get_orderly_account
+from orderly_config import get_privy_config
+from http_client import SESSION
 
 load_dotenv()
 
+# EIP-712 types for withdrawing funds
+WITHDRAW_TYPES = {
+    "EIP712Domain": EIP712_DOMAIN_TYPES,
+    "Withdraw": [
+        {"name": "brokerId", "type": "string"},
+        {"name": "chainId", "type": "uint256"},
+        {"name": "receiver", "type": "address"},
+        {"name": "token", "type": "string"},
+        {"name": "amount", "type": "uint256"},
+        {"name": "withdrawNonce", "type": "uint64"},
+        {"name": "timestamp", "type": "uint64"},
+    ],
+}
+
 # Token decimals mapping
 TOKEN_DECIMALS = {
     "USDC": 6,
@@ -26,7 +41,7 @@ TOKEN_DECIMALS = {
 }
 
 
-def get_withdrawal_nonce(account_id: str, orderly_key: str, orderly_private_key: bytes) -> int:
+def get_withdrawal_nonce(account_id: str, orderly_key: str, orderly_private_key: Ed25519PrivateKey) -> int:
     """Get withdrawal nonce from Orderly API"""
     path = "/v1/withdraw_nonce"
     request_config = create_authenticated_request(
@@ -38,15 +53,16 @@ def get_withdrawal_nonce(account_id: str, orderly_key: str, orderly_private_key:
         orderly_private_key
     )
     
-    response = requests.get(
+    response = SESSION.get(
         f"{ORDERLY_API_URL}{path}",
         headers=request_config["headers"]
     )
     
-    data = response.json()
-    
+    # Reject error responses before parsing the body
     if not response.ok:
-        raise Exception(f"Failed to get withdrawal nonce: {data}")
+        raise Exception(f"Failed to get withdrawal nonce ({response.status_code}): {response.text}")
+    
+    data = orjson.loads(response.content)
     
     return (
         data.get("data", {}).get("withdraw_nonce") or
@@ -58,9 +74,10 @@ def get_withdrawal_nonce(account_id: str, orderly_key: str, orderly_private_key:
 
 def withdraw_funds(wallet_id: str, amount: str = None, token: str = "USDC", chain_id: int = None) -> dict:
     """Withdraw funds from Orderly account"""
-    app_id = os.getenv("PRIVY_APP_ID")
-    app_secret = os.getenv("PRIVY_APP_SECRET")
-    authorization_secret = os.getenv("PRIVY_AUTHORIZATION_SECRET")
+    config = get_privy_config()
+    app_id = config.app_id
+    app_secret = config.app_secret
+    authorization_secret = config.authorization_secret
     
     if not app_id or not app_secret:
         raise ValueError("Missing PRIVY_APP_ID or PRIVY_APP_SECRET")
@@ -71,19 +88,16 @@ def withdraw_funds(wallet_id: str, amount: str = None, token: str = "USDC", chai
     if not amount:
         raise ValueError("Amount is required")
     
-    # Get Orderly keys from database
-    orderly_key, orderly_private_key_hex = get_orderly_keys_or_raise(wallet_id)
-    orderly_private_key = hex_to_private_key(orderly_private_key_hex)
-    
     chain_id = chain_id or CHAIN_ID
     chain_id_hex = f"0x{chain_id:x}"
     token = token.upper()
     
-    print("Fetching wallet details...")
-    wallet_address = get_wallet_address(wallet_id, app_id, app_secret)
-    print(f"   Wallet Address: {wallet_address}")
-    
-    account_id = get_account_id(wallet_address, BROKER_ID)
+    # Wallet address, account ID and signing key are resolved once for every signed request below
+    account = get_orderly_account(wallet_id)
+    wallet_address = account.wallet_address
+    account_id = account.account_id
+    orderly_key = account.orderly_key
+    orderly_private_key = account.signing_key
     
     print("\nPreparing withdrawal from Orderly...")
     print(f"   Wallet ID: {wallet_id}")
@@ -119,44 +133,20 @@ def withdraw_funds(wallet_id: str, amount: str = None, token: str = "USDC", chai
     print("\nStep 3: Creating EIP-712 message...")
     print(f"Message: {message}")
     
-    # Step 4: Create EIP-712 domain
-    domain = {
-        "name": "Orderly",
-        "version": "1",
-        "chainId": chain_id_hex,
-        "verifyingContract": WITHDRAW_VERIFYING_CONTRACT,
-    }
-    
-    # Step 5: Create EIP-712 types
+    # Step 4: Create EIP-712 typed data from the cached domain and static types
     typed_data = {
-        "domain": domain,
+        "domain": get_orderly_domain(chain_id, WITHDRAW_VERIFYING_CONTRACT),
         "message": message,
         "primary_type": "Withdraw",
-        "types": {
-            "EIP712Domain": [
-                {"name": "name", "type": "string"},
-                {"name": "version", "type": "string"},
-                {"name": "chainId", "type": "uint256"},
-                {"name": "verifyingContract", "type": "address"},
-            ],
-            "Withdraw": [
-                {"name": "brokerId", "type": "string"},
-                {"name": "chainId", "type": "uint256"},
-                {"name": "receiver", "type": "address"},
-                {"name": "token", "type": "string"},
-                {"name": "amount", "type": "uint256"},
-                {"name": "withdrawNonce", "type": "uint64"},
-                {"name": "timestamp", "type": "uint64"},
-            ],
-        },
+        "types": WITHDRAW_TYPES,
     }
     
-    # Step 6: Sign the EIP-712 message
+    # Step 5: Sign the EIP-712 message
     print("\nStep 4: Signing EIP-712 message...")
     signature = sign_typed_data(wallet_id, typed_data, app_id, app_secret, authorization_secret)
     print(f"\n✅ Signature generated: {signature}")
     
-    # Step 7: Create withdraw request
+    # Step 6: Create withdraw request
     print("\nStep 5: Creating withdrawal request...")
     path = "/v1/withdraw_request"
     
@@ -186,16 +176,17 @@ def withdraw_funds(wallet_id: str, amount: str = None, token: str = "USDC", chai
         orderly_private_key
     )
     
-    response = requests.post(
+    response = SESSION.post(
         f"{ORDERLY_API_URL}{path}",
         headers=request_config["headers"],
         data=request_config["body"]
     )
     
-    data = response.json()
-    
+    # Reject error responses before parsing the body
     if not response.ok:
-        raise Exception(f"Withdrawal request failed: {data}")
+        raise Exception(f"Withdrawal request failed ({response.status_code}): {response.text}")
+    
+    data = orjson.loads(response.content)
     
     if not data.get("success"):
         raise Exception(f"Withdrawal request failed: {data}")